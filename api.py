@@ -0,0 +1,1087 @@
+# api.py - Library layer: hides and extracts data in images without any console interaction.
+#
+# In memory:  images = embed_bytes(data, carriers);  data = extract_bytes(images)
+# On disk:    prepare_file/prepare_text + write_parts, extract_archive, read_text and verify_folder,
+#             which the interactive menu (writer.py, reader.py) and the batch commands (batch.py) are built on.
+
+import base64
+import hashlib
+import io
+import json
+import os
+from collections import Counter
+from pathlib import Path
+
+import config
+from helpers.carrier_helper import plan_carriers, load_carrier
+from helpers.text_helper import split_bytes_by_sizes
+from helpers.image_helper import png_save_options
+from helpers.file_helper import find_numbered_images, list_folders
+from helpers.dedup_helper import plan_chunks, ChunkWriter, ChunkImage, chunk_sources, scan_source
+from helpers.range_helper import pick_header, range_parts, offsets_match, span_parts, join_range, RangeCutter
+from helpers.catalog_helper import (allocate_folder, record_folder, replace_catalog, is_built, list_catalog,
+                                    search_catalog, split_folder_name, catalog_path)
+from helpers.byte_converter_helper import file_to_base64, base64_to_file, OrderedPartWriter
+from helpers.lsb_helper import image_to_pixels, reveal_message
+from helpers.container_helper import (pack_part, hide_part, is_container, reveal_part, payload_digest, KIND_TEXT,
+                                     KIND_FILE)
+from helpers.parity_helper import (LENGTH, check_layout, parity_count, encode_parity, recoverable_parts, recovery_reads,
+                                  rebuild_groups)
+from helpers import metrics_helper as metrics
+from helpers.parallel_helper import WorkerPool, run_parallel, resolve_workers
+from helpers.compression_helper import compress_bytes, compress_file, get_decompressor, decompress_bytes, CODEC_NAMES
+
+
+# Decoded carrier pixels by pool file name and PNG save options, set once per worker process by _init_worker.
+# Carriers not preloaded are decoded on first use and kept, least recently used first out beyond
+# config.CARRIER_CACHE, so a long-lived pool reuses the carriers of recent jobs without growing without bound.
+_carriers = {}
+_png_options = {}
+
+
+def _init_worker(carriers, png_options):
+    # Pool initializer: keeps the job's decoded carriers in each worker so every part only pays for a copy.
+    global _carriers, _png_options
+    _carriers = carriers
+    _png_options = png_options
+
+
+def _load_plan_carriers(plan):
+    # Loads each distinct carrier of a pool plan once and returns {pool file name: pixels}.
+    return {entry["file"]: load_carrier(entry) for entry, _ in plan if entry is not None}
+
+
+def _cached_carrier(part, entry):
+    # Returns a carrier's pixels from the worker's cache, loading it on a miss. Dicts keep insertion order, so
+    # re-inserting on every use leaves the least recently used carrier first, where eviction takes it from.
+    carrier = _carriers.pop(entry["file"], None)
+    if carrier is None:
+        with metrics.stage("load_carrier", part):
+            carrier = load_carrier(entry)
+    _carriers[entry["file"]] = carrier
+    while len(_carriers) > max(1, config.CARRIER_CACHE):
+        del _carriers[next(iter(_carriers))]
+    return carrier
+
+
+def _embed_part(job):
+    # Hides one packed container part in a copy of its pooled carrier and saves it. Runs inside pool workers.
+    part, output_name, entry, secret_data = job
+    carrier = _cached_carrier(part, entry)
+
+    with metrics.stage("embed", part, len(secret_data)):
+        secret_img = hide_part(carrier, secret_data)
+    with metrics.stage("png_save", part) as timing:
+        secret_img.save(output_name, format="PNG", **_png_options)
+        timing.add_bytes(os.path.getsize(output_name) if metrics.enabled() else 0)
+    return output_name
+
+
+def open_worker_pool(workers=None):
+    # Starts a WorkerPool for write_parts that outlives one job: its workers decode each carrier on first use
+    # and keep the most recently used ones (config.CARRIER_CACHE) for later jobs.
+    return WorkerPool(resolve_workers(workers), _init_worker, ({}, png_save_options()))
+
+
+def new_output_folder(prefix):
+    # Creates and returns the next numbered output folder for a prefix: text_1, text_2... or archive_1...
+    # The number comes from the catalog's counter, not from probing the output directory.
+    return allocate_folder(prefix)
+
+
+def _parity_layout():
+    # Returns the (group, parity) layout new jobs get from config, (0, 0) when parity is off.
+    if config.PARITY_PARTS <= 0:
+        return 0, 0
+    check_layout(config.PARITY_GROUP, config.PARITY_PARTS)
+    return config.PARITY_GROUP, config.PARITY_PARTS
+
+
+def _plan(payload_size, name, entries=None):
+    # Plans carriers for a payload and returns the job fields describing its parts. With parity on, every carrier
+    # keeps room for the length prefix of a parity row, so a group's parity parts fit its largest carrier.
+    group, parity = _parity_layout()
+    plan = plan_carriers(payload_size, name, entries=entries, reserve=LENGTH.size if parity else 0)
+    return {"plan": plan, "group": group, "parity": parity}
+
+
+def part_count(job):
+    # Returns how many images a prepared job needs: its data parts plus any parity parts.
+    return len(job["plan"]) + parity_count(len(job["plan"]), job["group"], job["parity"])
+
+
+def compression_name(job):
+    # Returns how a prepared job's payload is compressed: a codec name, or "<codec> per chunk" when deduplicated.
+    if "chunks" in job:
+        return f"{config.COMPRESSION} per chunk" if config.COMPRESSION != "none" else "none"
+    return CODEC_NAMES.get(job["codec"], str(job["codec"]))
+
+
+def reused_chunks(job):
+    # Returns how many parts of a deduplicated job reuse a chunk image instead of embedding one (0 otherwise).
+    if "chunks" not in job:
+        return 0
+    return sum(1 for entry, _ in job["plan"] if entry is None)
+
+
+def prepare_file(path):
+    # Compresses a file into a spooled buffer when it pays off and plans its pooled carriers. Returns a job dict
+    # for write_parts; its "payload" stream is read one part at a time and closed by write_parts.
+    # With config.DEDUP the file is planned as chunks instead, each compressed on its own when it is written.
+    # Raises RuntimeError when no carrier can hold the data.
+    name = os.path.basename(path)
+    size = os.path.getsize(path)
+    with metrics.stage("compress", n_bytes=size):
+        codec, payload, payload_size = compress_file(path, "none" if config.DEDUP else None)
+
+    # Pick pooled carriers so the payload fits in the fewest images, each part filled to its carrier's exact capacity
+    try:
+        with metrics.stage("plan"):
+            layout = plan_chunks(payload, payload_size) if config.DEDUP else _plan(payload_size, name)
+    except RuntimeError:
+        payload.close()
+        raise
+
+    with metrics.stage("digest", n_bytes=payload_size):
+        digest = payload_digest(payload)
+
+    return {
+        "kind": KIND_FILE,
+        "name": name,
+        "codec": codec,
+        "size": size,
+        "payload": payload,
+        "payload_size": payload_size,
+        "digest": digest,
+        **layout,
+    }
+
+
+def prepare_bytes(data: bytes, name="", kind=KIND_FILE, entries=None, dedup=None):
+    # Compresses an in-memory payload and plans its carriers: pooled ones, or the given carrier entries.
+    # Returns a job dict for write_parts or embed_parts. Raises RuntimeError when no carrier can hold the data.
+    # dedup cuts the uncompressed payload into chunk store chunks (see plan_chunks), which only write_parts can
+    # write; it defaults to config.DEDUP for pooled jobs.
+    if dedup is None:
+        dedup = config.DEDUP and entries is None
+    with metrics.stage("compress", n_bytes=len(data)):
+        codec, payload = compress_bytes(data, "none" if dedup else None)
+    with metrics.stage("plan"):
+        layout = plan_chunks(payload, len(payload)) if dedup else _plan(len(payload), name, entries)
+    with metrics.stage("digest", n_bytes=len(payload)):
+        digest = payload_digest(payload)
+
+    return {
+        "kind": kind,
+        "name": name,
+        "codec": codec,
+        "size": len(data),
+        "payload": payload,
+        "payload_size": len(payload),
+        "digest": digest,
+        **layout,
+    }
+
+
+def prepare_text(title: str, text: str, entries=None, dedup=None):
+    # Like prepare_bytes for a text message stored as UTF-8.
+    job = prepare_bytes(text.encode("utf-8"), title, KIND_TEXT, entries, dedup)
+    job["characters"] = len(text)
+    return job
+
+
+def _payload_chunks(job):
+    # Yields a job's payload cut to its plan's part sizes. File payloads are read from their stream lazily,
+    # in-memory payloads are sliced as memoryviews without copying.
+    payload = job["payload"]
+    if isinstance(payload, bytes):
+        return split_bytes_by_sizes(payload, (size for _, size in job["plan"]))
+    return (payload.read(size) for _, size in job["plan"])
+
+
+def _packed_parts(job):
+    # Yields (part, carrier entry, packed container bytes) for every part of a prepared job: the data parts in
+    # order, each group's parity parts right after its last data part. Parity parts reuse the carrier of their
+    # group's longest chunk, which the plan left room in.
+    plan = job["plan"]
+    total = len(plan)
+    group, parity = job["group"], job["parity"]
+
+    def pack(part, chunk, offset=0):
+        return pack_part(job["kind"], job["name"], part, total, chunk, job["codec"], config.LSB_BITS,
+                         config.LSB_ALPHA, job["digest"], group, parity, offset)
+
+    # Only the current group's chunks are kept, and only when parity is on
+    chunks = _payload_chunks(job)
+    pending = []
+    offset = 0
+    for i, (entry, size) in enumerate(plan, start=1):
+        with metrics.stage("split", i, size):
+            chunk = next(chunks)
+            packed = pack(i, chunk, offset)
+        yield i, entry, packed
+        offset += len(chunk)
+        if not parity:
+            continue
+
+        pending.append((entry, chunk))
+        if len(pending) == group or i == total:
+            index = (i - 1) // group
+            entry = max(pending, key=lambda item: len(item[1]))[0]
+            with metrics.stage("parity", index + 1, sum(len(c) for _, c in pending)):
+                parity_chunks = encode_parity([c for _, c in pending], parity)
+            for j, parity_chunk in enumerate(parity_chunks):
+                part = total + index * parity + j + 1
+                yield part, entry, pack(part, parity_chunk)
+            pending = []
+
+
+def write_parts(job, folder, workers=None, pool=None, on_done=None):
+    # Embeds a prepared job's parts (data, then parity) into its pooled carriers as numbered PNGs in folder,
+    # calling on_done(path) per image. Runs on an open WorkerPool when given (see open_worker_pool).
+    # Returns the image paths in part order.
+    # A deduplicated job only embeds the chunks the store lacks and links every part's chunk image into folder.
+    count = part_count(job)
+
+    # Output names are fixed per part up front, so they stay deterministic whatever order workers finish in
+    outputs = [os.path.join(folder, f"{i}{config.OUTPUT_SUFFIX}") for i in range(1, count + 1)]
+    if "chunks" in job:
+        # Compressed chunks are only fitted to a carrier as they are written, so workers load carriers on demand
+        store = ChunkWriter(job, outputs, _payload_chunks(job), on_done)
+        jobs, on_embedded, carriers = store.jobs(), store.stored, {}
+    else:
+        # A shared pool's workers were initialized when it opened and load carriers on demand, so only a pool
+        # of this call's own gets the plan's carriers up front
+        jobs = ((part, outputs[part - 1], entry, packed) for part, entry, packed in _packed_parts(job))
+        on_embedded, carriers = on_done, _load_plan_carriers(job["plan"]) if pool is None else {}
+
+    try:
+        run_parallel(
+            _embed_part, jobs, resolve_workers(workers, count),
+            on_done=on_embedded,
+            initializer=_init_worker, initargs=(carriers, png_save_options()),
+            pool=pool
+        )
+        if "chunks" in job:
+            store.finish(folder)
+    finally:
+        if not isinstance(job["payload"], bytes):
+            job["payload"].close()
+        if "chunks" in job:
+            store.discard()
+
+    record_folder(folder, _catalog_fields(job, count))
+    return outputs
+
+
+def _catalog_fields(job, count):
+    # Returns the catalog fields of a written job.
+    return {
+        "kind": "text" if job["kind"] == KIND_TEXT else "file",
+        "name": job["name"],
+        "total": len(job["plan"]),
+        "parity": count - len(job["plan"]),
+        "images": count,
+        "size": job["size"],
+        "payload_size": job["payload_size"],
+        "compression": compression_name(job),
+        "digest": job["digest"].hex(),
+    }
+
+
+def base64_backup_path(folder):
+    # Returns where an archive folder keeps its Base64 backup.
+    return os.path.join(folder, "base64", "payload.txt")
+
+
+def write_base64_backup(path, folder):
+    # Saves the Base64 backup of a file in the folder's base64 subfolder and returns its path.
+    base64_txt_path = base64_backup_path(folder)
+    os.makedirs(os.path.dirname(base64_txt_path), exist_ok=True)
+    with metrics.stage("base64_backup", n_bytes=os.path.getsize(path)):
+        file_to_base64(path, base64_txt_path)
+    return base64_txt_path
+
+
+def _carrier_entries(carriers):
+    # Decodes caller-supplied carriers once. Returns (plan entries, pixels by entry index).
+    pixels = [image_to_pixels(carrier) for carrier in carriers]
+    entries = [{"index": i, "width": p.shape[1], "height": p.shape[0]} for i, p in enumerate(pixels)]
+    return entries, dict(enumerate(pixels))
+
+
+def embed_parts(job, pixels=None):
+    # Embeds a prepared job in memory and returns one PIL image per part, in part order. pixels maps entry
+    # indexes to decoded carriers for jobs planned over caller-supplied carriers; pooled carriers are loaded.
+    if pixels is None:
+        pixels = _load_plan_carriers(job["plan"])
+        key = "file"
+    else:
+        key = "index"
+    images = {part: hide_part(pixels[entry[key]], packed) for part, entry, packed in _packed_parts(job)}
+    return [images[part] for part in sorted(images)]
+
+
+def embed_bytes(data, carriers=None, name=""):
+    # Hides data (bytes or a readable binary file object) and returns the PIL images in part order.
+    # carriers are the images to hide in (PIL images, pixel arrays, paths or file objects); any of them may
+    # carry several parts. Without carriers the local pool is used. Save the results as PNG: any lossy
+    # format destroys the hidden bits. Raises RuntimeError when no carrier can hold the data.
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        data = data.read()
+
+    if carriers is None:
+        return embed_parts(prepare_bytes(bytes(data), name, dedup=False))
+
+    entries, pixels = _carrier_entries(carriers)
+    return embed_parts(prepare_bytes(bytes(data), name, KIND_FILE, entries), pixels)
+
+
+def embed_text(text: str, title="", carriers=None):
+    # Like embed_bytes for a text message; extract_text returns the title and text.
+    if carriers is None:
+        return embed_parts(prepare_text(title, text, dedup=False))
+
+    entries, pixels = _carrier_entries(carriers)
+    return embed_parts(prepare_text(title, text, entries), pixels)
+
+
+def _reveal_part(job):
+    # Reveals and parses one image (path, file object, PIL image or pixel array). Runs inside pool workers and
+    # returns (idx, label, data, error). Binary containers carry "name" and raw "data" bytes; legacy images
+    # carry the old JSON payload.
+    idx, label, source = job
+    chunk_image = source if isinstance(source, ChunkImage) else None
+
+    try:
+        with metrics.stage("png_load", label):
+            pixels = image_to_pixels(chunk_image.path if chunk_image else source)
+        if is_container(pixels):
+            with metrics.stage("reveal", label) as timing:
+                data = reveal_part(pixels)
+                timing.add_bytes(len(data["data"]))
+            if chunk_image:
+                data = chunk_image.resolve(data, check_data=True)
+            return idx, label, data, None
+
+        secret = reveal_message(pixels, compat=config.STEGANO_COMPAT)
+        if not secret:
+            return idx, label, None, "no hidden data found"
+        return idx, label, json.loads(secret), None
+    except Exception as e:
+        return idx, label, None, str(e)
+
+
+def _verify_part(job):
+    # Like _reveal_part, but only the part's metadata travels back to the parent process.
+    idx, label, data, error = _reveal_part(job)
+    if data is not None:
+        data = {key: value for key, value in data.items() if key not in ("data", "text")}
+    return idx, label, data, error
+
+
+def _folder_sources(folder_path):
+    # Returns the numbered images of an output folder as reveal jobs.
+    # Raises ValueError when the folder holds no numbered images.
+    numbered_files = find_numbered_images(folder_path)
+    if not numbered_files:
+        raise ValueError("No output images found (e.g., 1_output.png, 2_output.png...).")
+    sources = [(idx, file, os.path.join(folder_path, file)) for idx, file in numbered_files]
+
+    # Deduplicated folders describe their parts in a manifest instead of the images
+    return chunk_sources(folder_path, sources)
+
+
+def _image_sources(images):
+    # Returns in-memory images (or paths and file objects) as reveal jobs, labelled by position.
+    return [(i, f"image {i}", image) for i, image in enumerate(images, start=1)]
+
+
+def _reveal_sources(sources, on_part, workers=None, pool=None, func=_reveal_part):
+    # Reveals every source and calls on_part(idx, data) for each readable part as workers finish, in any order.
+    # Returns the error messages in source order.
+    errors = []
+
+    def collect(result):
+        idx, label, data, error = result
+        if error:
+            errors.append((idx, f"{label}: {error}"))
+        else:
+            on_part(idx, data)
+
+    run_parallel(func, sources, resolve_workers(workers, len(sources)), on_done=collect, pool=pool)
+
+    # Report issues in image order, as the sequential reader did
+    return [message for _, message in sorted(errors)]
+
+
+def _summary(source, name, expected_total, received, errors):
+    # Builds the result dict shared by the extract and verify functions.
+    missing = []
+    if expected_total is not None:
+        missing = [k for k in range(1, expected_total + 1) if k not in received]
+
+    return {
+        "folder": source,
+        "name": name,
+        "total": expected_total,
+        "parts": len(received),
+        "missing": missing,
+        "errors": errors,
+        "ok": not missing and not errors,
+    }
+
+
+def _check_digest(summary, expected, actual):
+    # Records the payload SHA-256 the parts carry (None for legacy images) and, when no part is missing,
+    # flags a rebuilt payload that does not match it.
+    summary["digest"] = expected.hex() if expected is not None else None
+    if expected is None or summary["missing"]:
+        return
+    if actual != expected:
+        summary["errors"].append("payload hash mismatch: the rebuilt payload differs from the one that was hidden")
+        summary["ok"] = False
+
+
+def _raise_incomplete(summary):
+    # Turns a summary with missing parts or unreadable images into a ValueError for the in-memory API.
+    if not summary["ok"]:
+        problems = list(summary["errors"])
+        if summary["missing"]:
+            problems.append(f"missing parts: {summary['missing']}")
+        raise ValueError("; ".join(problems))
+
+
+def _parity_layout_of(data):
+    # Returns the (total, group, parity) layout a binary part records, or None when its payload has no parity.
+    if not data.get("parity"):
+        return None
+    return int(data["total"]), int(data["group"]), int(data["parity"])
+
+
+def _recover(sources, layout, locations, missing, known=None, workers=None, pool=None):
+    # Rebuilds missing data parts from parity parts. layout is (total, group, parity); locations maps every part
+    # number read (data and parity) to its source index; known maps part numbers to chunks already in memory,
+    # every other part a rebuild needs is revealed again. Returns ({part: chunk}, error messages).
+    known = known or {}
+    groups, needed = recovery_reads(missing, set(locations), *layout)
+
+    chunks = {part: known[part] for part in needed if part in known}
+    by_idx = {job[0]: job for job in sources}
+    jobs = [by_idx[locations[part]] for part in sorted(needed) if part not in chunks]
+    errors = _reveal_sources(jobs, lambda idx, data: chunks.__setitem__(data["part"], data["data"]), workers, pool)
+
+    recovered, rebuild_errors = rebuild_groups(chunks, groups, *layout)
+    return recovered, errors + rebuild_errors
+
+
+def _apply_recovery(summary, recovered, errors):
+    # Records parts rebuilt from parity. Once nothing is missing any more, the read errors of the damaged images
+    # move to "repaired" and the payload hash decides whether the result is sound.
+    summary["recovered"] = sorted(recovered)
+    summary["missing"] = [part for part in summary["missing"] if part not in recovered]
+    summary["parts"] += len(recovered)
+    summary["errors"].extend(errors)
+    summary["repaired"] = []
+    if recovered and not summary["missing"]:
+        summary["repaired"], summary["errors"] = summary["errors"], []
+    summary["ok"] = not summary["missing"] and not summary["errors"]
+
+
+def _extract(sources, open_output, source=None, workers=None, pool=None):
+    # Rebuilds a file payload from reveal sources into open_output(name, suffix), which returns a path or a
+    # binary file object, rebuilding lost parts from parity parts when the payload has them.
+    # Returns the _summary dict plus "output" (the path, or None when nothing was written), "recovered" and
+    # "repaired" (see _apply_recovery). Raises ValueError when no part could be read.
+    parts = {}
+    received = set()
+    locations = {}
+    part_writer = None
+    hasher = hashlib.sha256()
+    digest = None
+    layout = None
+    filename = None
+    expected_total = None
+
+    def collect(idx, data):
+        # Places each decoded part by its "part" field as workers finish, in any order
+        nonlocal filename, expected_total, part_writer, digest, layout
+
+        # Extract metadata and chunk (raw bytes, or base64 text for legacy images)
+        part = int(data.get("part", idx))
+        total = int(data.get("total", 0))
+        chunk = data.get("data", "")
+
+        if filename is None:
+            filename = data.get("name", data.get("filename", "extracted_file"))
+
+        if expected_total is None and total > 0:
+            expected_total = total
+
+        # Raw bytes stream straight into the output; legacy base64 text is kept for decoding at the end
+        if isinstance(chunk, bytes):
+            locations[part] = idx
+            layout = layout or _parity_layout_of(data)
+            if part_writer is None:
+                digest = data["digest"]
+                part_writer = OrderedPartWriter(
+                    open_output(filename, Path(filename).suffix),
+                    decompressor=get_decompressor(data.get("codec", 0)),
+                    hasher=hasher
+                )
+            # Parity parts are only read back if a data part turns out to be missing
+            if total and part > total:
+                return
+            with metrics.stage("write_output", part, len(chunk)):
+                part_writer.add(part, chunk)
+        else:
+            parts[part] = chunk
+        received.add(part)
+
+    errors = _reveal_sources(sources, collect, workers, pool)
+
+    if not received and not locations:
+        raise ValueError("No readable hidden data was found in these images.")
+
+    summary = _summary(source, filename, expected_total, received, errors)
+    summary["output"] = None
+    if layout is not None and summary["missing"]:
+        with metrics.stage("recover"):
+            recovered, recovery_errors = _recover(sources, layout, locations, summary["missing"], None, workers,
+                                                  pool)
+        for part, chunk in recovered.items():
+            with metrics.stage("write_output", part, len(chunk)):
+                part_writer.add(part, chunk)
+        _apply_recovery(summary, recovered, recovery_errors)
+
+    # Finish the streamed output, or rebuild the legacy Base64 document in order and decode it
+    try:
+        if part_writer is None:
+            if expected_total is None:
+                ordered_keys = sorted(parts.keys())
+            else:
+                ordered_keys = list(range(1, expected_total + 1))
+
+            document = json.loads("".join(parts.get(k, "") for k in ordered_keys))
+            part_writer = OrderedPartWriter(open_output(filename, document["extension"]))
+            part_writer.add(1, base64.b64decode(document["data"]))
+
+        with metrics.stage("write_output"):
+            part_writer.close()
+        summary["output"] = part_writer.output_path
+    except Exception as e:
+        summary["errors"].append(f"conversion failed: {e}")
+        summary["ok"] = False
+
+    _check_digest(summary, digest, hasher.digest())
+    return summary
+
+
+def extract_archive(folder_path: str, output_dir=None, workers=None, pool=None):
+    # Rebuilds the file hidden in an archive folder's images. The file is written as
+    # <folder>/extracted_file<ext>, or under its original name in output_dir.
+    # Returns the _summary dict plus "output" (None when the file could not be written).
+    # Raises ValueError when no part could be read.
+    def open_output(name, suffix):
+        if output_dir is None:
+            return os.path.join(folder_path, "extracted_file") + suffix
+        os.makedirs(output_dir, exist_ok=True)
+        return os.path.join(output_dir, Path(os.path.basename(name)).stem) + suffix
+
+    return _extract(_folder_sources(folder_path), open_output, folder_path, workers, pool)
+
+
+def extract_bytes(images, workers=1):
+    # Returns the data hidden by embed_bytes in images (PIL images, pixel arrays, paths or file objects, in any
+    # order). Raises ValueError when parts are missing or unreadable.
+    buffer = io.BytesIO()
+    summary = _extract(_image_sources(images), lambda name, suffix: buffer, workers=workers)
+    _raise_incomplete(summary)
+    return buffer.getvalue()
+
+
+def restore_base64_backup(folder_path: str, output_dir=None):
+    # Rebuilds an archive's file straight from its Base64 backup as <folder>/extracted_file<ext>, or
+    # <folder name><ext> in output_dir. Returns the output path. Raises OSError when there is no backup.
+    if output_dir is None:
+        output_name = os.path.join(folder_path, "extracted_file")
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+        output_name = os.path.join(output_dir, os.path.basename(os.path.normpath(folder_path)))
+    with metrics.stage("base64_restore", n_bytes=os.path.getsize(base64_backup_path(folder_path))):
+        return base64_to_file(base64_backup_path(folder_path), output_name)
+
+
+def _read_text(sources, source=None, workers=None, pool=None):
+    # Rebuilds a text payload from reveal sources, rebuilding lost parts from parity parts when it has them.
+    # Returns the _summary dict plus "text", "recovered" and "repaired" (see _apply_recovery).
+    # Raises ValueError when no part could be read.
+    parts = {}
+    chunks = {}
+    locations = {}
+    title = None
+    codec = 0
+    digest = None
+    layout = None
+    expected_total = None
+
+    def collect(idx, data):
+        nonlocal title, expected_total, codec, digest, layout
+
+        # Extract metadata and text (raw UTF-8 bytes, or a str for legacy images)
+        part = int(data.get("part", idx))
+        total = int(data.get("total", 0))
+        text = data.get("data", data.get("text", ""))
+
+        if title is None:
+            title = data.get("name", data.get("title"))
+
+        codec = data.get("codec", codec)
+        digest = data.get("digest", digest)
+
+        if expected_total is None and total > 0:
+            expected_total = total
+
+        # Binary parts, parity included, stay in memory so a parity rebuild needs no second read
+        if isinstance(text, bytes):
+            locations[part] = idx
+            chunks[part] = text
+            layout = layout or _parity_layout_of(data)
+            if total and part > total:
+                return
+        parts[part] = text
+
+    errors = _reveal_sources(sources, collect, workers, pool)
+
+    if not parts and not chunks:
+        raise ValueError("No readable hidden text was found in these images.")
+
+    summary = _summary(source, title, expected_total, set(parts), errors)
+    if layout is not None and summary["missing"]:
+        with metrics.stage("recover"):
+            recovered, recovery_errors = _recover(sources, layout, locations, summary["missing"], chunks, workers,
+                                                  pool)
+        parts.update(recovered)
+        _apply_recovery(summary, recovered, recovery_errors)
+
+    # Rebuild text in correct order
+    if expected_total is None:
+        ordered_keys = sorted(parts.keys())
+    else:
+        ordered_keys = list(range(1, expected_total + 1))
+
+    # Binary parts may split a UTF-8 character (or a compressed stream), so they are joined as bytes before decoding
+    actual = None
+    if chunks:
+        text_bytes = b"".join(parts.get(k, b"") for k in ordered_keys)
+        actual = hashlib.sha256(text_bytes).digest()
+        try:
+            with metrics.stage("decompress", n_bytes=len(text_bytes)):
+                text_bytes = decompress_bytes(text_bytes, codec)
+        except Exception as e:
+            summary["errors"].append(f"decompression failed: {e}")
+            summary["ok"] = False
+        full_text = text_bytes.decode("utf-8", errors="replace")
+    else:
+        full_text = "".join(parts.get(k, "") for k in ordered_keys)
+
+    _check_digest(summary, digest, actual)
+    summary["text"] = full_text
+    return summary
+
+
+def read_text(folder_path: str, workers=None, pool=None):
+    # Rebuilds the text hidden in a text folder's images. Returns the _summary dict plus "text".
+    # Raises ValueError when no part could be read.
+    return _read_text(_folder_sources(folder_path), folder_path, workers, pool)
+
+
+def extract_text(images, workers=1):
+    # Returns (title, text) hidden by embed_text in images, in any order.
+    # Raises ValueError when parts are missing or unreadable.
+    summary = _read_text(_image_sources(images), workers=workers)
+    _raise_incomplete(summary)
+    return summary["name"], summary["text"]
+
+
+def _range_header(sources):
+    # Returns the header of the lowest-numbered readable data part of a folder, decoding only leading rows. A part
+    # before the last is preferred, since its length is the size every data part but the last holds.
+    # Raises ValueError when no image carries a container.
+    def metas():
+        for _, _, source in sources:
+            try:
+                yield scan_source(source)
+            except Exception:
+                yield None
+
+    found = pick_header(metas())
+    if found is None:
+        raise ValueError("No readable PixelVault header was found (byte ranges need images written by this version).")
+    return found
+
+
+def _reveal_range_parts(sources, where, parts, first, layout, workers=None, pool=None):
+    # Reveals the given data parts from where ({part: reveal job}), rebuilding unreadable ones from parity when
+    # the payload has it. Returns ({part: header dict with "data"}, recovered parts, errors, whether every
+    # revealed image held the part its number promised).
+    revealed = {}
+    errors = []
+    numbered = True
+
+    def collect(idx, data):
+        nonlocal numbered
+        if data.get("digest") != first["digest"]:
+            errors.append(f"image {idx}: belongs to a different payload")
+            return
+        numbered = numbered and data["part"] == idx
+        revealed[data["part"]] = data
+
+    jobs = [where[part] for part in parts if part in where]
+    errors += _reveal_sources(jobs, collect, workers, pool)
+
+    recovered = []
+    missing = [part for part in parts if part not in revealed]
+    if missing and layout is not None:
+        # Images are named after their part, so every image not found broken stands for its part
+        broken = {job[0] for job in jobs} - {data["part"] for data in revealed.values()}
+        locations = {idx: idx for idx, _, _ in sources if idx not in broken}
+        known = {part: data["data"] for part, data in revealed.items()}
+        with metrics.stage("recover"):
+            rebuilt, recovery_errors = _recover(sources, layout, locations, missing, known, workers, pool)
+        errors += recovery_errors
+        for part, chunk in rebuilt.items():
+            if part in missing:
+                revealed[part] = {"part": part, "offset": (part - 1) * first["length"], "data": chunk}
+                recovered.append(part)
+    return revealed, sorted(recovered), errors, numbered
+
+
+def read_range(folder_path: str, start=0, length=None, workers=None, pool=None):
+    # Returns bytes [start, start + length) of the payload hidden in a folder (up to its end when length is None)
+    # while revealing only the images that hold them: every part records its offset, and every data part but the
+    # last holds the same number of bytes, so the first header locates the rest. Offsets count stored payload
+    # bytes, which are the original file's unless it was compressed; a compressed payload is instead decompressed
+    # from its first part onwards and reading stops as soon as the range is complete. Unreadable parts in the way
+    # are rebuilt from parity when the payload has it. The whole-payload hash cannot be checked, each part's CRC32 is.
+    # Returns {"folder", "name", "kind", "compression", "digest", "start", "end", "size" (None when unknown), "data",
+    # "parts" (data parts read or rebuilt), "recovered", "repaired" (read errors of the images rebuilt from parity),
+    # "missing", "errors", "ok"}.
+    # Raises ValueError for a negative range or a folder without container images.
+    if start < 0 or (length is not None and length < 0):
+        raise ValueError("the range start and length cannot be negative")
+    sources = _folder_sources(folder_path)
+    first = _range_header(sources)
+    layout = _parity_layout_of(first)
+    where = {job[0]: job for job in sources}
+    end = None if length is None else start + length
+
+    summary = {
+        "folder": folder_path, "name": first["name"], **_content(first), "start": start, "end": end, "size": None,
+        "data": b"", "parts": [], "recovered": [], "repaired": [], "missing": [], "errors": [],
+    }
+    if length != 0:
+        read = _read_stored_range if first["codec"] == 0 else _read_compressed_range
+        read(summary, sources, where, first, layout, workers, pool)
+
+    # Images are named after their part, so the read errors of a rebuilt part's image are repaired, not failures
+    labels = tuple(f"{label}: " for idx, label, _ in sources if idx in summary["recovered"])
+    summary["repaired"] = [e for e in summary["errors"] if e.startswith(labels)]
+    summary["errors"] = [e for e in summary["errors"] if not e.startswith(labels)]
+    summary["end"] = start + len(summary["data"])
+    summary["ok"] = not summary["missing"] and not summary["errors"]
+    return summary
+
+
+def _read_stored_range(summary, sources, where, first, layout, workers=None, pool=None):
+    # read_range for uncompressed payloads: only the parts overlapping the range are revealed.
+    start, end = summary["start"], summary["end"]
+    total, part_size = first["total"], max(1, first["length"])
+    parts = range_parts(start, end, total, part_size)
+    revealed, recovered, errors, numbered = _reveal_range_parts(sources, where, parts, first, layout, workers, pool)
+
+    # Missing or renamed images and unusual carrier plans break the shortcut; every header (cheap) then says
+    # where the parts are
+    if (not numbered or any(part not in revealed for part in parts)
+            or not offsets_match({part: data["offset"] for part, data in revealed.items()}, part_size)):
+        metas = {}
+        errors = _reveal_sources(sources, metas.__setitem__, workers, pool, func=_scan_part)
+        metas = {meta["part"]: (idx, meta) for idx, meta in metas.items()
+                 if meta["digest"] == first["digest"] and meta["part"] <= total}
+        where = {part: where[idx] for part, (idx, _) in metas.items()}
+        parts = span_parts({part: meta["offset"] for part, (_, meta) in metas.items()}, start, end, total)
+        revealed, recovered, more_errors, _ = _reveal_range_parts(sources, where, parts, first, layout, workers,
+                                                                  pool)
+        errors += more_errors
+
+    summary["parts"] = sorted(revealed)
+    summary["recovered"] = recovered
+    summary["missing"] = [part for part in parts if part not in revealed]
+    summary["errors"] = errors
+    if total in revealed:
+        summary["size"] = revealed[total]["offset"] + len(revealed[total]["data"])
+
+    summary["data"] = join_range({part: (data["offset"], data["data"]) for part, data in revealed.items()}, start, end)
+
+
+def _read_compressed_range(summary, sources, where, first, layout, workers=None, pool=None):
+    # read_range for compressed payloads: parts are revealed in order, a batch per worker round, and decompressed
+    # as a stream that is dropped before the range and cut off after it.
+    total = first["total"]
+    decompressor = get_decompressor(first["codec"])
+    batch = resolve_workers(workers, total)
+    cutter = RangeCutter(summary["start"], summary["end"])
+
+    for first_part in range(1, total + 1, batch):
+        parts = list(range(first_part, min(first_part + batch, total + 1)))
+        revealed, recovered, errors, _ = _reveal_range_parts(sources, where, parts, first, layout, workers, pool)
+        summary["recovered"] += recovered
+        summary["errors"] += errors
+        for part in parts:
+            if part not in revealed:
+                summary["missing"].append(part)
+                summary["data"] = bytes(cutter.data)
+                return
+            summary["parts"].append(part)
+            with metrics.stage("decompress", part, len(revealed[part]["data"])):
+                cutter.take(decompressor.decompress(revealed[part]["data"]))
+            if cutter.done:
+                summary["data"] = bytes(cutter.data)
+                return
+
+    cutter.take(decompressor.flush())
+    summary["size"] = cutter.position
+    summary["data"] = bytes(cutter.data)
+
+
+def extract_range(folder_path: str, start=0, length=None, output_dir=None, workers=None, pool=None):
+    # Writes a byte range of a folder's payload (see read_range) as <folder>/extracted_range_<start>-<end><ext>,
+    # or <name>_<start>-<end><ext> in output_dir. Returns the read_range dict without "data", plus "output".
+    summary = read_range(folder_path, start, length, workers, pool)
+    span = f"{summary['start']}-{summary['end']}"
+    name = Path(os.path.basename(summary["name"] or "extracted"))
+    if output_dir is None:
+        output = os.path.join(folder_path, f"extracted_range_{span}{name.suffix}")
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+        output = os.path.join(output_dir, f"{name.stem}_{span}{name.suffix}")
+    with metrics.stage("write_output", n_bytes=len(summary["data"])):
+        Path(output).write_bytes(summary.pop("data"))
+    summary["output"] = output
+    return summary
+
+
+def _majority_digest(digests, sources):
+    # Returns (digest, errors) for {idx: payload digest} read from sources: the digest most images carry (ties go
+    # to the payload of the lowest-numbered image) and one error per image mixed in from another archive.
+    ordered = [other for _, other in sorted(digests.items())]
+    counts = Counter(ordered)
+    digest = max(ordered, key=counts.__getitem__) if ordered else None
+    labels = {idx: label for idx, label, _ in sources}
+    errors = [
+        f"{labels[idx]}: belongs to a different payload"
+        for idx, other in sorted(digests.items()) if other != digest
+    ]
+    return digest, errors
+
+
+def _parity_status(summary, layout, present):
+    # Adds "parity" (parity parts found) and "recoverable" (missing data parts the parity parts can rebuild,
+    # which extraction will do) to a verify or scan summary.
+    summary["parity"] = 0
+    summary["recoverable"] = []
+    if layout is not None:
+        total, group, parity = layout
+        summary["parity"] = sum(1 for part in present if part > total)
+        summary["recoverable"] = recoverable_parts(summary["missing"], present, total, group, parity)
+
+
+def verify_folder(folder_path: str, workers=None, pool=None, payload_hash=True):
+    # Checks a folder's images in parallel without writing anything: every part must be present and pass its
+    # CRC32, and the data parts joined in order must match the payload SHA-256 they carry. With payload_hash=False
+    # only the per-part checks run, so no chunk data travels back from the workers.
+    # Returns the _summary dict plus "digest", "parity" and "recoverable" (see _parity_status).
+    # Raises ValueError when the folder holds no numbered images.
+    sources = _folder_sources(folder_path)
+    received = set()
+    present = set()
+    digests = {}
+    layout = None
+    name = None
+    expected_total = None
+    hasher = hashlib.sha256()
+    part_hasher = OrderedPartWriter(None, hasher=hasher)
+
+    def collect(idx, data):
+        nonlocal name, expected_total, layout
+        part = int(data.get("part", idx))
+        present.add(part)
+        if name is None:
+            name = data.get("name", data.get("filename", data.get("title")))
+        if expected_total is None and int(data.get("total", 0)) > 0:
+            expected_total = int(data["total"])
+        if "digest" in data:
+            digests[idx] = data["digest"]
+            layout = layout or _parity_layout_of(data)
+            if data["total"] and part > data["total"]:
+                return
+        received.add(part)
+        if isinstance(data.get("data"), bytes):
+            with metrics.stage("hash", part, len(data["data"])):
+                part_hasher.add(part, data["data"])
+
+    func = _reveal_part if payload_hash else _verify_part
+    errors = _reveal_sources(sources, collect, workers, pool, func=func)
+    part_hasher.close()
+
+    digest, foreign = _majority_digest(digests, sources)
+    errors += foreign
+
+    summary = _summary(folder_path, name, expected_total, received, errors)
+    _check_digest(summary, digest if payload_hash else None, hasher.digest())
+    if not payload_hash and digest is not None:
+        summary["digest"] = digest.hex()
+    _parity_status(summary, layout, present)
+    return summary
+
+
+def _scan_part(job):
+    # Reads one image's part metadata without its chunk. Runs inside pool workers and returns (idx, label, data, error).
+    idx, label, source = job
+    try:
+        with metrics.stage("scan", label):
+            meta = scan_source(source)
+        if meta is None:
+            return idx, label, None, "no PixelVault header (legacy image or no hidden data)"
+        return idx, label, meta, None
+    except Exception as e:
+        return idx, label, None, str(e)
+
+
+def _content(meta):
+    # Returns the shared content fields of a part header: kind, stored codec (a deduplicated folder's is its
+    # chunk's) and payload digest.
+    codec = meta.get("chunk_codec", meta["codec"])
+    compression = CODEC_NAMES.get(codec, str(codec))
+    return {
+        "kind": "text" if meta["kind"] == KIND_TEXT else "file",
+        "compression": compression if "chunk_codec" not in meta else f"{compression} per chunk",
+        "digest": meta["digest"].hex(),
+    }
+
+
+def scan_folder(folder_path: str, workers=None, pool=None):
+    # Lists a folder's parts from their headers alone: each PNG is only decoded up to the rows holding the
+    # header and name, so no chunk is read and nothing is checksummed (verify_folder does that).
+    # Returns the _summary dict plus "kind", "compression", "size" (stored payload bytes of the data parts
+    # found), "digest", "parity", "recoverable" (see _parity_status) and "images" ({"image", "part", "offset", "length"}
+    # in image order). Raises ValueError when the folder holds no numbered images.
+    sources = _folder_sources(folder_path)
+    metas = {}
+    errors = _reveal_sources(sources, metas.__setitem__, workers, pool, func=_scan_part)
+
+    digest, foreign = _majority_digest({idx: meta["digest"] for idx, meta in metas.items()}, sources)
+    errors += foreign
+    own = {idx: meta for idx, meta in metas.items() if meta["digest"] == digest}
+    first = own[min(own)] if own else None
+    data_parts = {meta["part"]: meta["length"] for meta in own.values() if meta["part"] <= meta["total"]}
+
+    summary = _summary(folder_path, first["name"] if first else None, first["total"] if first else None,
+                       set(data_parts), errors)
+    summary.update(_content(first) if first else {"kind": None, "compression": None, "digest": None})
+    summary["size"] = sum(data_parts.values())
+    _parity_status(summary, _parity_layout_of(first) if first else None, {meta["part"] for meta in own.values()})
+
+    labels = {idx: label for idx, label, _ in sources}
+    summary["images"] = [
+        {"image": labels[idx], "part": meta["part"], "offset": meta["offset"], "length": meta["length"]}
+        for idx, meta in sorted(metas.items())
+    ]
+    return summary
+
+
+def folder_overview(folder_path: str):
+    # Summarizes a folder for listings in constant time, whatever its size: only the headers of the first image
+    # and of the one numbered after the last data part are read. Every data part but the last fills the largest
+    # carrier of the plan, so the stored payload size follows from those two headers.
+    # Returns {"folder", "images", "expected", "name", "total", "parity", "kind", "compression", "size",
+    # "digest", "legacy", "error"}: "expected" counts data and parity images, "parity" the parity images;
+    # unknown fields are None. Raises ValueError when the folder holds no numbered images.
+    sources = _folder_sources(folder_path)
+    overview = {
+        "folder": folder_path, "images": len(sources), "expected": None, "name": None, "total": None,
+        "parity": None, "kind": None, "compression": None, "size": None, "digest": None, "legacy": False,
+        "error": None,
+    }
+
+    try:
+        first = scan_source(sources[0][2])
+    except Exception as e:
+        overview["error"] = str(e)
+        return overview
+    if first is None:
+        overview["legacy"] = True
+        return overview
+
+    total = first["total"]
+    parity = parity_count(total, first["group"], first["parity"])
+    overview.update(name=first["name"], total=total, parity=parity, expected=total + parity, **_content(first))
+
+    # Output images are numbered by part, so the last data part is image number total. An unreadable or
+    # renumbered image only leaves the size unknown
+    last_source = next((job[2] for job in sources if job[0] == total), None)
+    try:
+        last = first if total == 1 else scan_source(last_source) if last_source is not None else None
+    except Exception:
+        last = None
+    if first["part"] == 1 and last is not None and last["part"] == total and last["digest"] == first["digest"]:
+        overview["size"] = first["length"] * (total - 1) + last["length"]
+    return overview
+
+
+def rebuild_catalog():
+    # Rebuilds the output folder catalog from the folders on disk, reading each one with folder_overview.
+    # Folders it cannot read (no images, legacy format, unreadable header) are kept with their content unknown.
+    # The original size, which no header stores, and the creation time survive from the old catalog when the
+    # folder still holds the same payload. Returns the number of folders catalogued.
+    known = {row["folder"]: row for row in list_catalog()} if os.path.exists(catalog_path()) else {}
+    rows = []
+    for folder in list_folders(config.OUTPUT_DIR):
+        split = split_folder_name(folder)
+        if split is None:
+            continue
+        path = os.path.join(config.OUTPUT_DIR, folder)
+        row = {"folder": folder, "prefix": split[0], "number": split[1], "created": os.path.getmtime(path)}
+        try:
+            overview = folder_overview(path)
+        except ValueError:
+            overview = {"name": None}
+        if overview["name"] is not None:
+            row.update({field: overview[field] for field in ("kind", "name", "total", "parity", "compression",
+                                                             "digest")})
+            row["images"] = overview["expected"]
+            row["payload_size"] = overview["size"]
+        previous = known.get(folder)
+        if previous is not None and previous["digest"] == row.get("digest"):
+            row["size"] = previous["size"]
+            row["created"] = previous["created"]
+        rows.append(row)
+
+    replace_catalog(rows)
+    return len(rows)
+
+
+def catalog_folders(prefix=None):
+    # Returns the catalog rows of the output folders (all, or one prefix's) in number order; "folder" is the
+    # folder name, unknown content fields are None. The catalog is built from disk on first use.
+    if not is_built():
+        rebuild_catalog()
+    return list_catalog(prefix)
+
+
+def search_folders(query, kind=None):
+    # Returns the catalog rows whose text title or file name contains query (case-insensitive), optionally
+    # only of kind "text" or "file".
+    if not is_built():
+        rebuild_catalog()
+    return search_catalog(query, kind)
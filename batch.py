@@ -0,0 +1,196 @@
+# batch.py - Headless batch jobs behind the command-line subcommands: many inputs, one shared worker pool.
+
+import glob
+import os
+import sys
+from pathlib import Path
+
+import config
+from api import (open_worker_pool, prepare_file, prepare_text, write_parts, write_base64_backup, new_output_folder,
+                 reused_chunks, compression_name, extract_archive, extract_range, read_text, verify_folder, scan_folder)
+from helpers.file_helper import find_numbered_images
+from helpers import metrics_helper as metrics
+
+
+def expand_files(patterns):
+    # Expands paths, globs and directories (their files, not recursive) into a de-duplicated list of files.
+    # Returns (files, unmatched patterns).
+    files = []
+    unmatched = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or ([pattern] if os.path.exists(pattern) else [])
+        found = []
+        for match in matches:
+            if os.path.isdir(match):
+                found.extend(os.path.join(match, f) for f in sorted(os.listdir(match))
+                             if os.path.isfile(os.path.join(match, f)))
+            elif os.path.isfile(match):
+                found.append(match)
+        if not found:
+            unmatched.append(pattern)
+        files.extend(f for f in found if f not in files)
+    return files, unmatched
+
+
+def expand_folders(patterns):
+    # Expands paths and globs into output folders holding numbered images. A directory without numbered images
+    # stands for its subfolders, so "./output" covers every text_N and archive_N folder.
+    # Returns (folders, unmatched patterns).
+    folders = []
+    unmatched = []
+    for pattern in patterns:
+        found = []
+        for match in sorted(glob.glob(pattern)) or [pattern]:
+            if not os.path.isdir(match):
+                continue
+            if find_numbered_images(match):
+                found.append(match)
+            else:
+                found.extend(os.path.join(match, f) for f in sorted(os.listdir(match))
+                             if find_numbered_images(os.path.join(match, f)))
+        if not found:
+            unmatched.append(pattern)
+        folders.extend(f for f in found if f not in folders)
+    return folders, unmatched
+
+
+def _run_items(items, func, on_result, job_name):
+    # Runs func(item) for every item, turning exceptions into failed results so one bad input never stops the batch.
+    # With metrics on, each result gets its stage summary, and the full report is saved as
+    # metrics_<job_name> in the folder the item wrote or read.
+    results = []
+    for item in items:
+        try:
+            with metrics.job() as records:
+                result = func(item)
+        except Exception as e:
+            result = {"input": item, "ok": False, "error": str(e)}
+        else:
+            if records:
+                result["metrics"] = metrics.summarize(records)
+                if result.get("folder"):
+                    result["metrics_report"] = metrics.write_report(records, result["folder"], job_name)
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+    return results
+
+
+def _unmatched_results(unmatched):
+    return [{"input": pattern, "ok": False, "error": "no matching input"} for pattern in unmatched]
+
+
+def _write_job(job, prefix, pool, backup_source=None):
+    # Writes a prepared job into a new numbered folder and returns its result dict.
+    folder = new_output_folder(prefix)
+    backup = write_base64_backup(backup_source, folder) if backup_source else None
+    images = write_parts(job, folder, pool=pool)
+    return {
+        "ok": True,
+        "name": job["name"],
+        "folder": folder,
+        "images": len(images),
+        "size": job["size"],
+        "payload_size": job["payload_size"],
+        "compression": compression_name(job),
+        "base64": backup,
+        "reused_chunks": reused_chunks(job),
+    }
+
+
+def hide_files(patterns, workers=None, base64_backup=True, on_result=None):
+    # Hides every matched file in its own archive_N folder. Returns one result dict per file or unmatched pattern.
+    files, unmatched = expand_files(patterns)
+
+    with open_worker_pool(workers) as pool:
+        def hide(path):
+            result = _write_job(prepare_file(path), config.FOLDER_ARCHIVES_PREFIX, pool,
+                                path if base64_backup else None)
+            return {"input": path, **result}
+
+        return _run_items(files, hide, on_result, "hide") + _unmatched_results(unmatched)
+
+
+def hide_texts(patterns, title=None, text=None, workers=None, on_result=None):
+    # Hides text in text_N folders: the given text, or each matched UTF-8 file ("-" reads stdin) titled by
+    # its file name unless a title is given. Returns one result dict per text or unmatched pattern.
+    if text is not None:
+        items, unmatched = [None], []
+    else:
+        stdin = [p for p in patterns if p == "-"]
+        items, unmatched = expand_files([p for p in patterns if p != "-"])
+        items = stdin + items
+
+    with open_worker_pool(workers) as pool:
+        def hide(path):
+            if path is None:
+                content, name = text, title or ""
+            elif path == "-":
+                content, name = sys.stdin.read(), title or "stdin"
+            else:
+                content, name = Path(path).read_text(encoding="utf-8"), title or Path(path).stem
+
+            if not content.strip():
+                raise ValueError("No text entered.")
+            result = _write_job(prepare_text(name, content), config.FOLDER_PREFIX, pool)
+            return {"input": path or "--text", **result}
+
+        return _run_items(items, hide, on_result, "hide") + _unmatched_results(unmatched)
+
+
+def extract_folders(patterns, output_dir=None, workers=None, on_result=None):
+    # Extracts every matched folder: archives to their file, text folders to a .txt file (extracted_text.txt
+    # inside the folder, or <folder name>.txt in output_dir). Returns one result dict per folder or unmatched pattern.
+    folders, unmatched = expand_folders(patterns)
+
+    with open_worker_pool(workers) as pool:
+        def extract(folder):
+            if not os.path.basename(os.path.normpath(folder)).startswith(config.FOLDER_PREFIX):
+                return {"input": folder, **extract_archive(folder, output_dir, pool=pool)}
+
+            summary = read_text(folder, pool=pool)
+            if output_dir is None:
+                output = os.path.join(folder, "extracted_text.txt")
+            else:
+                os.makedirs(output_dir, exist_ok=True)
+                output = os.path.join(output_dir, os.path.basename(os.path.normpath(folder)) + ".txt")
+            Path(output).write_text(summary.pop("text"), encoding="utf-8")
+            return {"input": folder, **summary, "output": output}
+
+        return _run_items(folders, extract, on_result, "extract") + _unmatched_results(unmatched)
+
+
+def extract_ranges(patterns, start=0, length=None, output_dir=None, workers=None, on_result=None):
+    # Extracts bytes [start, start + length) of every matched folder's payload (to its end when length is None),
+    # revealing only the images that hold them. Returns one result dict per folder or unmatched pattern.
+    folders, unmatched = expand_folders(patterns)
+
+    with open_worker_pool(workers) as pool:
+        def extract(folder):
+            return {"input": folder, **extract_range(folder, start, length, output_dir, pool=pool)}
+
+        return _run_items(folders, extract, on_result, "extract_range") + _unmatched_results(unmatched)
+
+
+def verify_folders(patterns, workers=None, payload_hash=True, on_result=None):
+    # Checks every matched folder for missing or corrupt parts (and, unless payload_hash is False, the whole
+    # payload hash) without writing anything.
+    folders, unmatched = expand_folders(patterns)
+
+    with open_worker_pool(workers) as pool:
+        def verify(folder):
+            return {"input": folder, **verify_folder(folder, pool=pool, payload_hash=payload_hash)}
+
+        return _run_items(folders, verify, on_result, "verify") + _unmatched_results(unmatched)
+
+
+def scan_folders(patterns, workers=None, on_result=None):
+    # Lists the content of every matched folder from part headers alone (name, parts, sizes, payload hash);
+    # much faster than verify_folders, but no chunk is read or checksummed.
+    folders, unmatched = expand_folders(patterns)
+
+    with open_worker_pool(workers) as pool:
+        def scan(folder):
+            return {"input": folder, **scan_folder(folder, pool=pool)}
+
+        return _run_items(folders, scan, on_result, "scan") + _unmatched_results(unmatched)
@@ -0,0 +1 @@
+# Empty __init__.py - benchmarks are run as modules from the project root (python -m benchmarks.<name>)
@@ -0,0 +1,70 @@
+# png_benchmark.py - Time/size trade-off of each PNG encoding profile on fully embedded carriers.
+#
+# Usage: python -m benchmarks.png_benchmark [--sizes 1920x1080 640x480] [--repeat 3] [--pool]
+
+import argparse
+import io
+import os
+import time
+
+import config
+from helpers.carrier_helper import generate_carrier, load_carrier, load_pool_index
+from helpers.container_helper import pack_part, hide_part, chunk_capacity, KIND_FILE
+from helpers.image_helper import png_save_options
+
+
+def parse_size(text):
+    width, _, height = text.partition("x")
+    return int(width), int(height)
+
+
+def embedded_carriers(sizes, use_pool):
+    # Yields (label, PIL image) carriers filled to capacity with random data, like real output parts.
+    if use_pool:
+        carriers = [(entry["file"], load_carrier(entry)) for entry in load_pool_index()]
+    else:
+        carriers = [(f"synthetic {w}x{h}", generate_carrier(w, h, seed=0)) for w, h in sizes]
+
+    for label, pixels in carriers:
+        height, width = pixels.shape[:2]
+        chunk = os.urandom(chunk_capacity(width, height, "payload.bin", config.LSB_BITS, config.LSB_ALPHA))
+        packed = pack_part(KIND_FILE, "payload.bin", 1, 1, chunk, bits=config.LSB_BITS, alpha=config.LSB_ALPHA)
+        yield label, hide_part(pixels, packed)
+
+
+def time_save(image, options, repeat):
+    # Returns the best wall time of repeat saves and the encoded size in bytes.
+    best = None
+    size = 0
+    for _ in range(repeat):
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        image.save(buffer, format="PNG", **options)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        size = buffer.tell()
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PNG encoding profile benchmark")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=config.SYNTHETIC_CARRIER_SIZES[:3],
+                        help="synthetic carrier sizes as WIDTHxHEIGHT")
+    parser.add_argument("--pool", action="store_true", help="use the carriers in the local pool instead")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for label, image in embedded_carriers(args.sizes, args.pool):
+        raw_mb = image.width * image.height * len(image.getbands()) / (1024 * 1024)
+        print(f"{label}  ({raw_mb:.2f} MB raw)")
+
+        baseline = None
+        for profile in config.PNG_PROFILES:
+            elapsed, size = time_save(image, png_save_options(profile), args.repeat)
+            baseline = baseline or (elapsed, size)
+            print(f"{profile:>10}: {elapsed * 1000:9.1f} ms  {raw_mb / elapsed:8.2f} MB/s  "
+                  f"{size / 1024:10.1f} KB  ({size / baseline[1]:6.1%} size, {elapsed / baseline[0]:5.2f}x time)")
+
+
+if __name__ == "__main__":
+    main()
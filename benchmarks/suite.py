@@ -0,0 +1,332 @@
+# suite.py - Offline benchmark suite with JSON results, to compare throughput across commits and dependency upgrades.
+#
+# Usage: python -m benchmarks.suite [--sizes 1KB 1MB 16MB] [--carrier 1920x1080] [--stages ...] [--repeat 3]
+#                                   [--workers 1] [--output results.json] [--compare baseline.json]
+#
+# Per-image stages (capacity, embed, png_save, png_load, reveal, scan, stegano_*, compat_*) time one carrier
+# filled to capacity: every full part of a payload costs the same, so they do not depend on payload size.
+# Size stages (split, roundtrip) run once per --sizes entry, from 1 KB up to 1 GB; a 1 GB round trip writes
+# and reads back about 1300 images at 1920x1080 and takes minutes per CPU core.
+# Everything runs in a temporary working directory with its own synthetic carrier pool, so no network, pool
+# or output folder of the project is touched. Progress goes to stderr, the JSON document to stdout or --output.
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+
+from PIL import Image
+from stegano import lsb
+
+import config
+import api
+from helpers.text_helper import split_bytes_by_sizes
+from helpers.image_helper import png_save_options
+from helpers.carrier_helper import generate_carrier, add_carrier, calculate_capacity
+from helpers.container_helper import pack_part, hide_part, reveal_part, scan_part, chunk_capacity, KIND_FILE
+from helpers.lsb_helper import image_to_pixels, hide_message, reveal_message
+from helpers.parallel_helper import resolve_workers
+
+MB = 1024 * 1024
+UNITS = {"B": 1, "KB": 1024, "MB": MB, "GB": 1024 * MB}
+STAGES = ["split", "capacity", "embed", "png_save", "png_load", "reveal", "scan",
+          "stegano_hide", "stegano_reveal", "compat_hide", "compat_reveal", "roundtrip"]
+NAME = "payload.bin"
+
+
+def parse_bytes(text):
+    # Parses "1KB", "16MB", "1GB" or a plain byte count.
+    text = text.strip().upper()
+    for unit in ("KB", "MB", "GB", "B"):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * UNITS[unit])
+    return int(text)
+
+
+def format_bytes(n):
+    for unit in ("GB", "MB", "KB"):
+        if n >= UNITS[unit] and n % UNITS[unit] == 0:
+            return f"{n // UNITS[unit]}{unit}"
+    return f"{n}B"
+
+
+def parse_size(text):
+    width, _, height = text.partition("x")
+    return int(width), int(height)
+
+
+def best_time(func, repeat):
+    # Returns the best wall time of repeat calls and the last result.
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def make_text(n_bytes):
+    # Builds n_bytes of UTF-8 text mixing 1-3 byte characters, cut on a character boundary.
+    # Repeats a str block so a 1 GB input never needs a second full-size bytes copy
+    block = "Olá, ação! Größe 10€ — données " * 4096
+    encoded = block.encode("utf-8")
+    full, rest = divmod(n_bytes, len(encoded))
+    return block * full + encoded[:rest].decode("utf-8", errors="ignore")
+
+
+def write_payload(path, n_bytes, kind):
+    # Writes a synthetic payload file in blocks: random bytes (incompressible) or repetitive text.
+    block_size = 8 * MB
+    text_block = make_text(block_size).encode("utf-8")
+    with open(path, "wb") as f:
+        remaining = n_bytes
+        while remaining:
+            n = min(block_size, remaining)
+            f.write(os.urandom(n) if kind == "random" else text_block[:n])
+            remaining -= n
+
+
+def environment(args):
+    # Records what the numbers depend on, so runs from different commits and machines can be told apart.
+    def version(package):
+        try:
+            return metadata.version(package)
+        except metadata.PackageNotFoundError:
+            return None
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": {name: version(name) for name in ("numpy", "Pillow", "stegano", "zstandard")},
+        "config": {
+            "LSB_BITS": config.LSB_BITS,
+            "LSB_ALPHA": config.LSB_ALPHA,
+            "COMPRESSION": config.COMPRESSION,
+            "COMPRESSION_LEVEL": config.COMPRESSION_LEVEL,
+            "PNG_PROFILE": config.PNG_PROFILE,
+            "PARITY_PARTS": config.PARITY_PARTS,
+            "PARITY_GROUP": config.PARITY_GROUP,
+        },
+        "carrier": "x".join(map(str, args.carrier)),
+        "stegano_carrier": "x".join(map(str, args.stegano_carrier)),
+        "workers": resolve_workers(args.workers),
+        "repeat": args.repeat,
+        "payload": args.payload,
+    }
+
+
+def result(stage, seconds, n_bytes, **extra):
+    return {"stage": stage, "seconds": round(seconds, 6), "bytes": n_bytes,
+            "mb_per_s": round(n_bytes / MB / seconds, 3) if seconds > 0 and n_bytes else None, **extra}
+
+
+def image_stages(stages, args, log):
+    # Times the per-image stages on one synthetic carrier filled to capacity.
+    width, height = args.carrier
+    carrier = generate_carrier(width, height, seed=0)
+    capacity = chunk_capacity(width, height, NAME, config.LSB_BITS, config.LSB_ALPHA)
+    chunk = os.urandom(capacity)
+    packed = pack_part(KIND_FILE, NAME, 1, 1, chunk, bits=config.LSB_BITS, alpha=config.LSB_ALPHA)
+    label = f"{width}x{height}"
+
+    embedded = hide_part(carrier, packed)
+    buffer = io.BytesIO()
+    embedded.save(buffer, format="PNG", **png_save_options())
+    png = buffer.getvalue()
+    png_path = os.path.join(os.getcwd(), "carrier.png")
+    with open(png_path, "wb") as f:
+        f.write(png)
+
+    timed = {
+        "capacity": lambda: calculate_capacity(png_path, NAME),
+        "embed": lambda: hide_part(carrier, packed),
+        "png_save": lambda: embedded.save(io.BytesIO(), format="PNG", **png_save_options()),
+        "png_load": lambda: image_to_pixels(io.BytesIO(png)),
+        "reveal": lambda: reveal_part(image_to_pixels(io.BytesIO(png))),
+        "scan": lambda: scan_part(io.BytesIO(png)),
+    }
+    for stage, func in timed.items():
+        if stage not in stages:
+            continue
+        # Capacity is a header read; repeat it enough to rise above timer noise
+        calls = 1000 if stage == "capacity" else 1
+        seconds, value = best_time(lambda: [func() for _ in range(calls)][-1], args.repeat)
+        seconds /= calls
+        if stage == "reveal" and value["data"] != chunk:
+            raise SystemExit("reveal returned different bytes")
+        n_bytes = 0 if stage in ("capacity", "scan") else capacity
+        yield result(stage, seconds, n_bytes, carrier=label)
+        log(f"{stage:>15} {label:>10}: {seconds * 1000:10.3f} ms")
+
+    if not any(stage.startswith(("stegano_", "compat_")) for stage in stages):
+        return
+
+    # stegano's pure-Python engine against the vectorized one, on a smaller carrier: only legacy images use it
+    width, height = args.stegano_carrier
+    small = Image.fromarray(generate_carrier(width, height, seed=1))
+    message = make_text(width * height * 3 // 8 * 9 // 10 - 16)
+    n_bytes = len(message.encode("utf-8"))
+    label = f"{width}x{height}"
+    hidden = hide_message(small, message)
+
+    # stegano closes the images it is given, so each of its calls gets a copy
+    timed = {
+        "stegano_hide": lambda: lsb.hide(small.copy(), message),
+        "stegano_reveal": lambda: lsb.reveal(hidden.copy()),
+        "compat_hide": lambda: hide_message(small, message),
+        "compat_reveal": lambda: reveal_message(hidden),
+    }
+    for stage, func in timed.items():
+        if stage not in stages:
+            continue
+        seconds, value = best_time(func, args.repeat)
+        if stage.endswith("reveal") and value != message:
+            raise SystemExit(f"{stage} returned a different message")
+        yield result(stage, seconds, n_bytes, carrier=label)
+        log(f"{stage:>15} {label:>10}: {seconds * 1000:10.3f} ms")
+
+
+def size_stages(stages, args, log):
+    # Times the size-dependent stages for every payload size.
+    width, height = args.carrier
+    capacity = chunk_capacity(width, height, NAME, config.LSB_BITS, config.LSB_ALPHA)
+
+    for size in args.sizes:
+        label = format_bytes(size)
+        if "split" in stages:
+            # Cuts an in-memory payload into carrier-sized parts the way write_parts takes them, one at a time
+            payload = bytes(size)
+            sizes = [capacity] * -(-size // capacity)
+            seconds, parts = best_time(lambda: sum(1 for _ in split_bytes_by_sizes(payload, sizes)), args.repeat)
+            del payload
+            yield result("split", seconds, size, size=label, parts=parts)
+            log(f"{'split':>15} {label:>10}: {seconds * 1000:10.3f} ms")
+
+        if "roundtrip" in stages:
+            yield roundtrip(size, label, args, log)
+
+
+def roundtrip(size, label, args, log):
+    # Hides a payload file into a new archive folder and extracts it again, the path the menu's
+    # "hide file" and "extract file" options take, and checks the result byte for byte.
+    path = os.path.join(config.INPUT_FILES_DIR, NAME)
+    write_payload(path, size, args.payload)
+
+    with api.open_worker_pool(args.workers) as pool:
+        start = time.perf_counter()
+        job = api.prepare_file(path)
+        folder = api.new_output_folder(config.FOLDER_ARCHIVES_PREFIX)
+        images = api.write_parts(job, folder, pool=pool)
+        hide_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        summary = api.extract_archive(folder, output_dir="restored", pool=pool)
+        extract_seconds = time.perf_counter() - start
+
+    if not summary["ok"] or not _same_file(path, summary["output"]):
+        raise SystemExit(f"round trip of {label} failed: {summary['errors'] or summary['missing']}")
+
+    stored = sum(os.path.getsize(image) for image in images)
+    for image in images:
+        os.remove(image)
+    os.remove(summary["output"])
+
+    log(f"{'roundtrip':>15} {label:>10}: {(hide_seconds + extract_seconds) * 1000:10.3f} ms  ({len(images)} images)")
+    return result("roundtrip", hide_seconds + extract_seconds, size, size=label, images=len(images),
+                  hide_seconds=round(hide_seconds, 6), extract_seconds=round(extract_seconds, 6),
+                  png_bytes=stored)
+
+
+def _same_file(a, b):
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        while True:
+            block_a, block_b = fa.read(MB), fb.read(MB)
+            if block_a != block_b:
+                return False
+            if not block_a:
+                return True
+
+
+def _key(entry):
+    return entry["stage"], entry.get("size") or entry.get("carrier")
+
+
+def compare(baseline_path, results, log):
+    # Prints each stage's time against a previous run's JSON: below 1.00x is faster.
+    with open(baseline_path) as f:
+        baseline = {_key(entry): entry for entry in json.load(f)["results"]}
+    log(f"\nAgainst {baseline_path}:")
+    for entry in results:
+        old = baseline.get(_key(entry))
+        if old and old["seconds"]:
+            log(f"{entry['stage']:>15} {_key(entry)[1]:>10}: {entry['seconds'] / old['seconds']:6.2f}x time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite with JSON output")
+    parser.add_argument("--sizes", nargs="+", type=parse_bytes, default=[1024, MB, 16 * MB],
+                        help="payload sizes for split and roundtrip, e.g. 1KB 1MB 1GB")
+    parser.add_argument("--carrier", type=parse_size, default=config.SYNTHETIC_CARRIER_SIZES[0],
+                        help="synthetic carrier size as WIDTHxHEIGHT")
+    parser.add_argument("--stegano-carrier", type=parse_size, default=(640, 480),
+                        help="carrier size for the stegano_* and compat_* stages")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--payload", choices=["random", "text"], default="random",
+                        help="round-trip payload: incompressible random bytes or compressible text")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for the round trip")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the JSON document here instead of stdout")
+    parser.add_argument("--compare", help="previous JSON output to print time ratios against")
+    args = parser.parse_args()
+
+    def log(message):
+        print(message, file=sys.stderr)
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.compare) if args.compare else None
+    document = {"environment": environment(args), "results": []}
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="pixelvault-bench-") as workdir:
+        os.chdir(workdir)
+        try:
+            os.makedirs(config.INPUT_FILES_DIR)
+            add_carrier(generate_carrier(*args.carrier, seed=0))
+            for entry in image_stages(args.stages, args, log):
+                document["results"].append(entry)
+            for entry in size_stages(args.stages, args, log):
+                document["results"].append(entry)
+        finally:
+            os.chdir(cwd)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(document, f, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        print()
+
+    if baseline:
+        compare(baseline, document["results"], log)
+
+
+if __name__ == "__main__":
+    main()
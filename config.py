@@ -1,18 +1,64 @@
 #config.py - Configuration constants for the Image Text Writer project.
 
 # Directories
-OUTPUT_TEMP_FILES = "./output/temp/"
+OUTPUT_TEMP_FILES = "./output/temp/"  # Only for spills over SPOOL_MAX_BYTES (payloads, early parts), unique per job
 OUTPUT_DIR = "./output"
 INPUT_FILES_DIR = "./input/files"
-TEMP_IMAGE = "./output/temp/image.png"
+CATALOG_FILE = "catalog.sqlite3"  # SQLite catalog of the output folders, kept inside OUTPUT_DIR
 
-# API
+# Carriers
+CARRIER_POOL_DIR = "./carriers"  # Pre-decoded carriers (.npy) indexed by resolution and capacity
+CARRIER_FALLBACK = "synthetic"  # When the pool is empty: "synthetic" (offline generator) or "download"
+SYNTHETIC_CARRIER_SIZES = [(1920, 1080), (1024, 768), (640, 480), (320, 240)]  # Mixed sizes let small final parts use small carriers
+
+# API (optional pool refill)
 DOG_API_URL = "https://dog.ceo/api/breeds/image/random"
 API_TIMEOUT = 10
 
 # Steganography settings
-SAFETY_FACTOR = 0.75
-OVERHEAD_BASE = 512
+LSB_BITS = 1  # Least significant bits used per channel (1-4); recorded in each image, so the reader needs no setting
+LSB_ALPHA = False  # Also embed into the alpha channel (RGB carriers get an opaque alpha channel added)
+STEGANO_COMPAT = True  # Fall back to stegano.lsb.reveal for images the bulk decoder cannot parse
+
+# Compression (applied before splitting; skipped automatically when the data does not shrink)
+COMPRESSION = "zlib"  # "none", "zlib", "lzma", "bz2" or "zstd" (needs the zstandard package)
+COMPRESSION_LEVEL = 6
+SPOOL_MAX_BYTES = 4 * 1024 * 1024  # Compressed payloads and early parts spill to a temp file beyond this (about one carrier)
+
+# Error correction: PARITY_PARTS extra images per PARITY_GROUP data images let the reader rebuild up to
+# PARITY_PARTS lost images of each group (0 turns parity off). BASE64_BACKUP keeps the plaintext
+# base64/payload.txt copy of hidden files, which doubles disk usage
+PARITY_PARTS = 0
+PARITY_GROUP = 10
+BASE64_BACKUP = True
+
+# Deduplication: with DEDUP on, hidden payloads are cut into DEDUP_CHUNK_SIZE chunks, each embedded once in
+# CHUNK_STORE_DIR as an image named by its SHA-256. Job folders hard-link the chunk images they need (copies
+# where links are not supported) next to a manifest.json, so re-hiding a file, or one sharing aligned regions
+# with an earlier one, only embeds the chunks never seen before. Chunks must fit the largest carrier; each is
+# compressed on its own (a whole-stream codec would change every byte after the first edit)
+DEDUP = False
+DEDUP_CHUNK_SIZE = 256 * 1024
+CHUNK_STORE_DIR = "./output/chunks"
+
+# PNG output encoding (Pillow save options). compress_type is the zlib strategy:
+# 1 filtered, 2 Huffman only, 3 RLE, 4 fixed. LSB-modified pixels are noise-like, so skipping
+# the LZ77 match search ("fast") costs almost no size.
+PNG_PROFILE = "default"  # "default", "fast" (throughput-first bulk jobs) or "small" (archival)
+PNG_PROFILES = {
+    "default": {"compress_level": 6},
+    "fast": {"compress_level": 1, "compress_type": 2},
+    "small": {"compress_level": 9, "optimize": True},
+}
+
+# Instrumentation: per-stage wall/CPU time, bytes and peak memory of every job, shown after it and saved
+# in its folder as metrics_<job>.json or .csv (METRICS_REPORT = None keeps it on screen only)
+METRICS = False
+METRICS_REPORT = "json"
+
+# Parallelism
+WORKERS = 0  # Worker processes for embedding/extraction; 0 uses one per CPU core, 1 runs sequentially
+CARRIER_CACHE = 8  # Decoded carriers each worker keeps between parts and jobs (2-6 MB each), least recently used dropped
 
 # File patterns
 FILE_PATTERN = r"^(\d+)_output\.png$"
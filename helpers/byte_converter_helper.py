@@ -2,25 +2,29 @@
 
 import base64
 import json
+import os
+import tempfile
 from pathlib import Path
 
+import config
+
 
 # Convert file to Base64
 # file_to_base64("./output/text_1/1_output.png", "payload.txt")
 
-def file_to_base64(input_path: str, output_txt: str):
+def file_to_base64(input_path: str, output_txt: str, chunk_size=3 * 1024 * 1024):
     path = Path(input_path)
 
-    data = path.read_bytes()
-    b64 = base64.b64encode(data).decode("ascii")
-
-    payload = {
-        "extension": path.suffix,  # stores the extension
-        "data": b64
-    }
-
-    Path(output_txt).write_text(json.dumps(payload))
-    print("File converted to Base64 with extension saved.")
+    # Streams the same JSON document json.dumps would produce, encoding a chunk at a time.
+    # chunk_size is a multiple of 3 so no Base64 padding appears mid-stream.
+    with open(path, "rb") as src, open(output_txt, "w") as dst:
+        dst.write('{"extension": ' + json.dumps(path.suffix) + ', "data": "')  # stores the extension
+        while True:
+            data = src.read(chunk_size)
+            if not data:
+                break
+            dst.write(base64.b64encode(data).decode("ascii"))
+        dst.write('"}')
 
 
 # Restore file from Base64
@@ -36,8 +40,95 @@ def base64_to_file(input_txt: str, output_name: str):
 
     output_path = output_name + extension
     Path(output_path).write_bytes(file_bytes)
-
-    print(f"File recreated: {output_path}")
+    return output_path
+
+
+# Write parts to a file in order while they arrive out of order
+# writer = OrderedPartWriter("arquivo_restaurado.pdf"); writer.add(2, b"..."); writer.add(1, b"..."); writer.close()
+
+class OrderedPartWriter:
+    # Streams numbered parts to output (a path, a binary file object left open on close, or None to only
+    # hash) in part order, buffering only parts that arrive early.
+    # Early parts stay in memory up to max_pending bytes (config.SPOOL_MAX_BYTES by default); beyond that they
+    # spill to an unnamed temp file, so a missing part never makes the whole rest of the payload pile up in RAM.
+    # An optional incremental decompressor (decompress/flush) is applied as the ordered stream is written, and
+    # an optional hashlib object is fed the ordered parts as received, before decompression.
+
+    def __init__(self, output, first_part=1, decompressor=None, hasher=None, max_pending=None):
+        self.bytes_written = 0
+        self._decompressor = decompressor
+        self._hasher = hasher
+        if isinstance(output, (str, os.PathLike)):
+            self.output_path = output
+            self._file = open(output, "wb")
+        else:
+            self.output_path = None
+            self._file = output
+        self._next_part = first_part
+        self._pending = {}
+        self._pending_bytes = 0
+        self._max_pending = config.SPOOL_MAX_BYTES if max_pending is None else max_pending
+        self._spill = None
+
+    def add(self, part, chunk: bytes):
+        # Queues a part and writes every part that is now contiguous; duplicates of written parts are ignored.
+        if part < self._next_part or part in self._pending:
+            return
+        if part == self._next_part:
+            self._write(chunk)
+            self._next_part += 1
+        else:
+            self._queue(part, chunk)
+
+        while self._next_part in self._pending:
+            self._write(self._take(self._next_part))
+            self._next_part += 1
+
+    def close(self):
+        # Writes parts left behind a gap (a missing part) in order, then closes the file.
+        try:
+            for part in sorted(self._pending):
+                self._write(self._take(part))
+            if self._decompressor is not None and self._file is not None:
+                self._file.write(self._decompressor.flush())
+        finally:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+            if self.output_path is not None:
+                self._file.close()
+
+    def _queue(self, part, chunk):
+        # Keeps an early part in memory, or appends it to the spill file once the memory budget is used up
+        if self._pending_bytes + len(chunk) <= self._max_pending:
+            self._pending[part] = chunk
+            self._pending_bytes += len(chunk)
+            return
+        if self._spill is None:
+            os.makedirs(config.OUTPUT_TEMP_FILES, exist_ok=True)
+            self._spill = tempfile.TemporaryFile(dir=config.OUTPUT_TEMP_FILES)
+        self._spill.seek(0, 2)
+        self._pending[part] = (self._spill.tell(), len(chunk))
+        self._spill.write(chunk)
+
+    def _take(self, part):
+        item = self._pending.pop(part)
+        if isinstance(item, tuple):
+            offset, length = item
+            self._spill.seek(offset)
+            return self._spill.read(length)
+        self._pending_bytes -= len(item)
+        return item
+
+    def _write(self, chunk):
+        if self._hasher is not None:
+            self._hasher.update(chunk)
+        if self._file is None:
+            return
+        if self._decompressor is not None:
+            chunk = self._decompressor.decompress(chunk)
+        self._file.write(chunk)
+        self.bytes_written += len(chunk)
 
 
 # EXAMPLE USAGE
@@ -0,0 +1,219 @@
+# carrier_helper.py - Local pool of pre-decoded carrier images and an offline synthetic carrier generator.
+
+import os
+import json
+import time
+import random
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+import config
+from helpers.lsb_helper import image_to_pixels
+from helpers.image_helper import fetch_random_dog_image
+from helpers.container_helper import chunk_capacity
+from helpers import metrics_helper as metrics
+
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+LOCK_STALE_SECONDS = 30
+
+# Index cache per pool directory, keyed on the index file's mtime, so picking a carrier is a stat,
+# a dict lookup and one .npy read
+_index_cache = {}
+
+
+def _index_path(pool_dir):
+    return os.path.join(pool_dir, INDEX_FILE)
+
+
+def load_pool_index(pool_dir=config.CARRIER_POOL_DIR):
+    # Returns the pool index: a list of {"file", "width", "height", "channels", "capacity"} entries.
+    try:
+        mtime = os.stat(_index_path(pool_dir)).st_mtime_ns
+    except OSError:
+        return []
+
+    cached = _index_cache.get(pool_dir)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(_index_path(pool_dir)) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        entries = []
+
+    _index_cache[pool_dir] = (mtime, entries)
+    return entries
+
+
+def _save_pool_index(entries, pool_dir):
+    # Writes the index through a uniquely named temp file, so concurrent refills never share a scratch path
+    os.makedirs(pool_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=pool_dir)
+    with os.fdopen(fd, "w") as f:
+        json.dump(entries, f, indent=2)
+    os.replace(temp_path, _index_path(pool_dir))
+
+
+@contextmanager
+def _index_lock(pool_dir):
+    # Serializes index updates across processes with an exclusively created lock file (works on every OS).
+    # A lock older than LOCK_STALE_SECONDS is assumed to belong to a crashed process and is taken over.
+    os.makedirs(pool_dir, exist_ok=True)
+    lock_path = os.path.join(pool_dir, LOCK_FILE)
+    while True:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+                    os.remove(lock_path)
+            except OSError:
+                pass
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.remove(lock_path)
+
+
+def add_carrier(image, pool_dir=config.CARRIER_POOL_DIR):
+    # Decodes an image (path, PIL image or pixel array) once and stores it in the pool as a raw .npy buffer.
+    pixels = image_to_pixels(image)
+    height, width, channels = pixels.shape
+
+    number = 1 + sum(1 for e in load_pool_index(pool_dir) if e["width"] == width and e["height"] == height)
+
+    # Claim the file name exclusively, so a concurrent refill picking the same number moves on to the next one
+    os.makedirs(pool_dir, exist_ok=True)
+    while True:
+        file_name = f"{width}x{height}_{number}.npy"
+        try:
+            f = open(os.path.join(pool_dir, file_name), "xb")
+        except FileExistsError:
+            number += 1
+            continue
+        with f:
+            np.save(f, pixels)
+        break
+
+    # Re-read the index under the lock so entries added by a concurrent refill are kept
+    with _index_lock(pool_dir):
+        entries = list(load_pool_index(pool_dir))
+        entries.append({
+            "file": file_name,
+            "width": width,
+            "height": height,
+            "channels": channels,
+            "capacity": width * height * 3 // 8,  # Raw bytes at 1 bit per RGB channel
+        })
+        _save_pool_index(entries, pool_dir)
+    return file_name
+
+
+def load_carrier(entry, pool_dir=config.CARRIER_POOL_DIR):
+    # Loads a pooled carrier's pixels; no PNG decoding is involved.
+    return np.load(os.path.join(pool_dir, entry["file"]))
+
+
+def generate_carrier(width=None, height=None, seed=None):
+    # Builds a natural-looking procedural carrier: smooth colour gradients from upscaled noise plus fine grain.
+    width = width or config.SYNTHETIC_CARRIER_SIZES[0][0]
+    height = height or config.SYNTHETIC_CARRIER_SIZES[0][1]
+    rng = np.random.default_rng(seed)
+
+    coarse = rng.integers(0, 256, (max(2, height // 64), max(2, width // 64), 3), dtype=np.uint8)
+    smooth = np.array(Image.fromarray(coarse).resize((width, height), Image.BICUBIC), dtype=np.int16)
+    grain = rng.integers(-12, 13, (height, width, 3), dtype=np.int16)
+    return np.clip(smooth + grain, 0, 255).astype(np.uint8)
+
+
+def refill_pool(count, source="download", pool_dir=config.CARRIER_POOL_DIR):
+    # Adds count carriers to the pool from the dog API ("download") or the generator ("synthetic").
+    # Synthetic carriers cycle through config.SYNTHETIC_CARRIER_SIZES. Returns how many were added;
+    # failed downloads are skipped. Downloads are decoded in memory and never touch a scratch file.
+    added = 0
+    for i in range(count):
+        if source == "download":
+            with metrics.stage("download", i + 1):
+                image = fetch_random_dog_image()
+            if image is None:
+                continue
+        else:
+            width, height = config.SYNTHETIC_CARRIER_SIZES[i % len(config.SYNTHETIC_CARRIER_SIZES)]
+            with metrics.stage("generate_carrier", i + 1):
+                image = generate_carrier(width, height)
+        with metrics.stage("add_carrier", i + 1):
+            add_carrier(image, pool_dir)
+        added += 1
+    return added
+
+
+def _ensure_pool(pool_dir):
+    # Returns the pool index, filling an empty pool from config.CARRIER_FALLBACK first
+    # ("synthetic" adds one carrier per configured size without network, "download" fetches one).
+    entries = load_pool_index(pool_dir)
+    if entries:
+        return entries
+
+    count = len(config.SYNTHETIC_CARRIER_SIZES) if config.CARRIER_FALLBACK == "synthetic" else 1
+    if not refill_pool(count, config.CARRIER_FALLBACK, pool_dir):
+        raise RuntimeError("No carrier available: the pool is empty and refilling it failed")
+    return load_pool_index(pool_dir)
+
+
+def calculate_capacity(image, name="", bits=None, alpha=None):
+    # Calculates the exact number of payload bytes one part can carry in this image for the given title/filename.
+    # Accepts a decoded pixel array (no I/O) or an image path. plan_carriers works from pool entries instead.
+    bits = config.LSB_BITS if bits is None else bits
+    alpha = config.LSB_ALPHA if alpha is None else alpha
+
+    if isinstance(image, np.ndarray):
+        height, width = image.shape[:2]
+        return chunk_capacity(width, height, name, bits, alpha)
+
+    try:
+        with Image.open(image) as img:
+            width, height = img.size
+            return chunk_capacity(width, height, name, bits, alpha)
+    except Exception:
+        return 0
+
+
+def plan_carriers(payload_size, name, bits=None, alpha=None, pool_dir=config.CARRIER_POOL_DIR, entries=None,
+                  reserve=0):
+    # Chooses a carrier for every part so the payload fits in the fewest images: the largest carriers for
+    # the full parts and the smallest carrier that still fits for the final partial part.
+    # Plans over the pool, or over the given entries (dicts with at least "width" and "height") instead.
+    # reserve bytes of every carrier are left unused, so a part reusing the carrier can hold that much more.
+    # Returns a list of (entry, chunk size) in part order; chunk sizes add up to payload_size.
+    bits = config.LSB_BITS if bits is None else bits
+    alpha = config.LSB_ALPHA if alpha is None else alpha
+
+    sized = [
+        (chunk_capacity(e["width"], e["height"], name, bits, alpha) - reserve, e["width"] * e["height"], e)
+        for e in (_ensure_pool(pool_dir) if entries is None else entries)
+    ]
+    sized = [item for item in sized if item[0] > 0]
+    if not sized:
+        raise RuntimeError("Every carrier is too small to hold any data")
+
+    # Full parts: any of the carriers with the largest capacity, picked at random for variety
+    largest = max(capacity for capacity, _, _ in sized)
+    largest_entries = [e for capacity, _, e in sized if capacity == largest]
+    full_parts, remainder = divmod(payload_size, largest)
+
+    plan = [(random.choice(largest_entries), largest) for _ in range(full_parts)]
+
+    # Final partial part (or the only part of an empty payload): smallest carrier by pixels that fits
+    if remainder or not plan:
+        fitting = [(pixels, capacity, e) for capacity, pixels, e in sized if capacity >= remainder]
+        _, _, entry = min(fitting, key=lambda item: (item[0], item[1]))
+        plan.append((entry, remainder))
+
+    return plan
@@ -0,0 +1,185 @@
+# catalog_helper.py - SQLite catalog of output folders: next-index allocation and search without directory scans.
+#
+# The catalog sits in the output directory (config.CATALOG_FILE). A counter per folder prefix hands out the next
+# folder number in one indexed lookup, and every finished job records its content (kind, name, parts, sizes,
+# hash), so listings and searches never touch the folders themselves. rebuild_catalog in api.py reconstructs
+# it from the folders on disk.
+
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+
+import config
+from helpers.file_helper import list_folders
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    prefix TEXT PRIMARY KEY,
+    next_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS folders (
+    folder TEXT PRIMARY KEY,
+    prefix TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    kind TEXT,
+    name TEXT,
+    total INTEGER,
+    parity INTEGER,
+    images INTEGER,
+    size INTEGER,
+    payload_size INTEGER,
+    compression TEXT,
+    digest TEXT,
+    created REAL
+);
+CREATE INDEX IF NOT EXISTS folders_by_prefix ON folders (prefix, number);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Content fields a job records, in column order
+FIELDS = ["kind", "name", "total", "parity", "images", "size", "payload_size", "compression", "digest"]
+COLUMNS = ["folder", "prefix", "number"] + FIELDS + ["created"]
+
+
+def catalog_path(output_dir=None):
+    return os.path.join(output_dir or config.OUTPUT_DIR, config.CATALOG_FILE)
+
+
+@contextmanager
+def _open(output_dir=None):
+    # Yields a connection in autocommit mode, so writers take the lock explicitly with BEGIN IMMEDIATE.
+    output_dir = output_dir or config.OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    with closing(sqlite3.connect(catalog_path(output_dir), timeout=30, isolation_level=None)) as db:
+        db.row_factory = sqlite3.Row
+        db.executescript(SCHEMA)
+        yield db
+
+
+@contextmanager
+def _transaction(db):
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
+
+
+def split_folder_name(folder):
+    # Returns (prefix, number) of a numbered folder name such as "archive_12", or None.
+    match = re.match(r"^(.*?)(\d+)$", folder)
+    if not match or match.group(1) not in (config.FOLDER_PREFIX, config.FOLDER_ARCHIVES_PREFIX):
+        return None
+    return match.group(1), int(match.group(2))
+
+
+def _catalog_key(output_dir, folder):
+    # Returns the catalog key (folder name) of a folder directly inside output_dir, or None for any other folder.
+    parent, name = os.path.split(os.path.normpath(folder))
+    if os.path.abspath(parent) != os.path.abspath(output_dir):
+        return None
+    return name
+
+
+def _next_on_disk(output_dir, prefix):
+    # Seeds a prefix's counter from the folders already on disk (one directory listing per prefix, ever).
+    numbers = [split[1] for split in map(split_folder_name, list_folders(output_dir)) if split and split[0] == prefix]
+    return max(numbers, default=0) + 1
+
+
+def allocate_folder(prefix, output_dir=None):
+    # Creates the next numbered folder for a prefix (text_1, text_2... or archive_1...) and returns its path.
+    # Numbers only grow, so a deleted job's number is never reused; a folder created behind the catalog's back
+    # is skipped over.
+    output_dir = output_dir or config.OUTPUT_DIR
+    with _open(output_dir) as db, _transaction(db):
+        row = db.execute("SELECT next_number FROM counters WHERE prefix = ?", (prefix,)).fetchone()
+        number = row["next_number"] if row else _next_on_disk(output_dir, prefix)
+        while True:
+            folder = os.path.join(output_dir, f"{prefix}{number}")
+            try:
+                os.makedirs(folder)
+                break
+            except FileExistsError:
+                number += 1
+
+        db.execute("INSERT OR REPLACE INTO counters (prefix, next_number) VALUES (?, ?)", (prefix, number + 1))
+        db.execute("INSERT OR REPLACE INTO folders (folder, prefix, number, created) VALUES (?, ?, ?, ?)",
+                   (f"{prefix}{number}", prefix, number, time.time()))
+    return folder
+
+
+def record_folder(folder, fields, output_dir=None):
+    # Records a job's content fields (see FIELDS) for a numbered folder of the output directory; folders
+    # anywhere else are ignored.
+    output_dir = output_dir or config.OUTPUT_DIR
+    key = _catalog_key(output_dir, folder)
+    split = split_folder_name(key) if key else None
+    if split is None:
+        return
+
+    # The creation time allocate_folder recorded is kept; only a folder new to the catalog gets the current time
+    values = [fields.get(field) for field in FIELDS]
+    updates = ", ".join(f"{field} = excluded.{field}" for field in FIELDS)
+    with _open(output_dir) as db, _transaction(db):
+        db.execute(
+            f"INSERT INTO folders ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+            f"ON CONFLICT (folder) DO UPDATE SET {updates}",
+            [key, *split, *values, time.time()]
+        )
+
+
+def replace_catalog(rows, output_dir=None):
+    # Replaces every folder row with rows (dicts with the COLUMNS keys; missing ones are NULL) and resets each
+    # prefix's counter to one past its highest folder number. Marks the catalog as built.
+    output_dir = output_dir or config.OUTPUT_DIR
+    with _open(output_dir) as db, _transaction(db):
+        db.execute("DELETE FROM folders")
+        db.execute("DELETE FROM counters")
+        db.executemany(
+            f"INSERT INTO folders ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+            [[row.get(column) for column in COLUMNS] for row in rows]
+        )
+        db.execute("INSERT INTO counters (prefix, next_number) "
+                   "SELECT prefix, MAX(number) + 1 FROM folders GROUP BY prefix")
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', ?)", (str(time.time()),))
+
+
+def is_built(output_dir=None):
+    # Returns True once the catalog has been built from the folders on disk (see replace_catalog).
+    path = catalog_path(output_dir)
+    if not os.path.exists(path):
+        return False
+    with _open(output_dir) as db:
+        return db.execute("SELECT 1 FROM meta WHERE key = 'built'").fetchone() is not None
+
+
+def list_catalog(prefix=None, output_dir=None):
+    # Returns the catalog rows as dicts, in folder number order, optionally only those of one prefix.
+    with _open(output_dir) as db:
+        if prefix is None:
+            rows = db.execute("SELECT * FROM folders ORDER BY prefix, number")
+        else:
+            rows = db.execute("SELECT * FROM folders WHERE prefix = ? ORDER BY number", (prefix,))
+        return [dict(row) for row in rows]
+
+
+def search_catalog(query, kind=None, output_dir=None):
+    # Returns the rows whose name (text title or file name) contains query, case-insensitively, optionally only
+    # of one kind ("text" or "file"), in folder number order. A substring match cannot use an index, so this
+    # scans the table; that is one pass over a few columns per folder, never a directory scan.
+    pattern = "%" + re.sub(r"([\\%_])", r"\\\1", query) + "%"
+    sql = "SELECT * FROM folders WHERE name LIKE ? ESCAPE '\\'"
+    params = [pattern]
+    if kind is not None:
+        sql += " AND kind = ?"
+        params.append(kind)
+    with _open(output_dir) as db:
+        return [dict(row) for row in db.execute(sql + " ORDER BY prefix, number", params)]
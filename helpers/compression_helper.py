@@ -0,0 +1,147 @@
+# compression_helper.py - Optional compression stage applied to payloads before they are split into images.
+
+import bz2
+import lzma
+import os
+import tempfile
+import zlib
+
+import config
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; the stdlib codecs are always available
+    zstandard = None
+
+# Codec ids are stored in each part's container header, so they must never be renumbered
+CODECS = {
+    "none": 0,
+    "zlib": 1,
+    "lzma": 2,
+    "bz2": 3,
+    "zstd": 4,
+}
+CODEC_NAMES = {codec_id: name for name, codec_id in CODECS.items()}
+
+# Size of the leading block compressed first to decide whether compression is worth it
+PROBE_SIZE = 1024 * 1024
+READ_SIZE = 1024 * 1024
+
+
+class _Decompressor:
+    # Gives every codec the same incremental decompress(data) / flush() interface.
+
+    def __init__(self, codec_id):
+        if codec_id == CODECS["zlib"]:
+            self._obj = zlib.decompressobj()
+        elif codec_id == CODECS["lzma"]:
+            self._obj = lzma.LZMADecompressor()
+        elif codec_id == CODECS["bz2"]:
+            self._obj = bz2.BZ2Decompressor()
+        elif codec_id == CODECS["zstd"]:
+            _require_zstd()
+            self._obj = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            raise ValueError(f"unknown compression codec id {codec_id}")
+
+    def decompress(self, data: bytes):
+        return self._obj.decompress(data)
+
+    def flush(self):
+        flush = getattr(self._obj, "flush", None)
+        return flush() if flush else b""
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise ValueError("zstd compression needs the 'zstandard' package (pip install zstandard)")
+
+
+def get_compressor(codec: str, level: int):
+    # Returns an incremental compressor object with compress(data) and flush() for the named codec.
+    if codec == "zlib":
+        return zlib.compressobj(level)
+    if codec == "lzma":
+        return lzma.LZMACompressor(preset=level)
+    if codec == "bz2":
+        return bz2.BZ2Compressor(max(1, level))
+    if codec == "zstd":
+        _require_zstd()
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    raise ValueError(f"unknown compression codec '{codec}' (choose from {', '.join(CODECS)})")
+
+
+def get_decompressor(codec_id: int):
+    # Returns an incremental decompressor for a codec id read from a container header, or None for "none".
+    if codec_id == CODECS["none"]:
+        return None
+    return _Decompressor(codec_id)
+
+
+def compress_bytes(data: bytes, codec=None, level=None):
+    # Compresses an in-memory payload and returns (codec_id, data), keeping the original when it does not shrink.
+    codec = config.COMPRESSION if codec is None else codec
+    level = config.COMPRESSION_LEVEL if level is None else level
+    if codec == "none" or not data:
+        return CODECS["none"], data
+
+    compressor = get_compressor(codec, level)
+    compressed = compressor.compress(data) + compressor.flush()
+    if len(compressed) >= len(data):
+        return CODECS["none"], data
+    return CODECS[codec], compressed
+
+
+def decompress_bytes(data: bytes, codec_id: int):
+    # Reverses compress_bytes for the codec id recorded in the header.
+    decompressor = get_decompressor(codec_id)
+    if decompressor is None:
+        return data
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def compress_file(file_path, codec=None, level=None):
+    # Compresses a file into a spooled temporary file (in memory until config.SPOOL_MAX_BYTES, then on disk).
+    # Returns (codec_id, binary file object positioned at 0, size); the original file is returned when
+    # compressing would not shrink it. The caller closes the returned file object.
+    codec = config.COMPRESSION if codec is None else codec
+    level = config.COMPRESSION_LEVEL if level is None else level
+
+    source = open(file_path, "rb")
+    if codec == "none":
+        return CODECS["none"], source, _size(source)
+
+    # Probe the first block so already-compressed inputs are not compressed in full for nothing
+    probe = source.read(PROBE_SIZE)
+    probe_compressor = get_compressor(codec, level)
+    if not probe or len(probe_compressor.compress(probe) + probe_compressor.flush()) >= len(probe):
+        source.seek(0)
+        return CODECS["none"], source, _size(source)
+
+    # Stays in memory up to SPOOL_MAX_BYTES; only then does it roll over to a uniquely named file on disk
+    os.makedirs(config.OUTPUT_TEMP_FILES, exist_ok=True)
+    spool = tempfile.SpooledTemporaryFile(max_size=config.SPOOL_MAX_BYTES, dir=config.OUTPUT_TEMP_FILES)
+    compressor = get_compressor(codec, level)
+    data = probe
+    while data:
+        spool.write(compressor.compress(data))
+        data = source.read(READ_SIZE)
+    spool.write(compressor.flush())
+
+    compressed_size = spool.tell()
+    if compressed_size >= source.tell():
+        spool.close()
+        source.seek(0)
+        return CODECS["none"], source, _size(source)
+
+    source.close()
+    spool.seek(0)
+    return CODECS[codec], spool, compressed_size
+
+
+def _size(file_obj):
+    position = file_obj.tell()
+    file_obj.seek(0, 2)
+    size = file_obj.tell()
+    file_obj.seek(position)
+    return size
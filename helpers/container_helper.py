@@ -0,0 +1,191 @@
+# container_helper.py - Binary part container: a compact fixed header followed by the raw chunk bytes.
+
+import hashlib
+import struct
+import zlib
+
+import numpy as np
+
+from helpers.lsb_helper import image_to_pixels, pixels_to_image, embed_bits, extract_bits, channel_capacity
+from helpers.png_helper import load_leading_pixels
+
+# "PXV" can never start stegano's "<length>:" prefix, so both layouts can be told apart from the first byte
+MAGIC = b"PXV"
+VERSION = 6
+
+KIND_TEXT = 0
+KIND_FILE = 1
+# A deduplicated chunk image: no name, part 0 of 0, and the SHA-256 of its own chunk in place of the payload's.
+# The manifest of every folder using it says which part of which payload it is
+KIND_CHUNK = 2
+
+# Always stored at 1 bit per RGB channel, so the reader learns the embedding mode before reading anything else.
+# magic, version, mode (low nibble: LSBs per channel, MODE_ALPHA: alpha channel carries data too)
+PREAMBLE = struct.Struct(">3sBB")
+PREAMBLE_PIXELS = -(-PREAMBLE.size * 8 // 3)
+MODE_ALPHA = 0x10
+
+# Stored right after the preamble at the recorded depth:
+# kind, compression codec, part, total, chunk length, chunk offset, chunk crc32, payload sha256, data parts per
+# parity group, parity parts per group, name length. total counts data parts; parity parts are numbered after them.
+# offset is where the chunk starts in the stored payload (the original file, unless compressed); 0 for parity parts.
+# Every part carries the SHA-256 of the whole stored (possibly compressed) payload, so a rebuilt or
+# verified archive can be checked end to end, not only part by part
+HEADER = struct.Struct(">BBIIIQI32sHBH")
+
+# Block size payload_digest reads file payloads in
+READ_SIZE = 1024 * 1024
+
+
+def encode_mode(bits, alpha=False):
+    # Packs the LSB depth (1-4 bits per channel) and the alpha flag into the preamble's mode byte.
+    if not 1 <= bits <= 4:
+        raise ValueError("LSB depth must be between 1 and 4 bits per channel")
+    return bits | (MODE_ALPHA if alpha else 0)
+
+
+def decode_mode(mode):
+    # Returns (bits, alpha) from a preamble mode byte.
+    bits = mode & 0x0F
+    if not 1 <= bits <= 4:
+        raise ValueError(f"invalid LSB depth {bits}")
+    return bits, bool(mode & MODE_ALPHA)
+
+
+def header_size(name: str):
+    # Returns the number of bytes stored at the chosen depth before the chunk (header plus UTF-8 name).
+    return HEADER.size + len(name.encode("utf-8"))
+
+
+def chunk_capacity(width, height, name: str, bits=1, alpha=False):
+    # Returns exactly how many chunk bytes fit in a width x height carrier after the preamble, header and name.
+    # Padding to whole pixels never overflows: the body's bit capacity is itself a whole number of pixels.
+    channels = 4 if alpha else 3
+    body_bits = max(0, width * height - PREAMBLE_PIXELS) * channels * bits
+    return max(0, body_bits // 8 - header_size(name))
+
+
+def payload_digest(payload):
+    # Returns the SHA-256 of a payload given as bytes or a seekable binary file object (rewound afterwards).
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(payload).digest()
+
+    digest = hashlib.sha256()
+    payload.seek(0)
+    for block in iter(lambda: payload.read(READ_SIZE), b""):
+        digest.update(block)
+    payload.seek(0)
+    return digest.digest()
+
+
+def pack_part(kind, name: str, part, total, chunk: bytes, codec=0, bits=1, alpha=False, digest=bytes(32),
+              group=0, parity=0, offset=0):
+    # Builds the container bytes for one part: preamble, header, UTF-8 name, then the raw (possibly compressed) chunk.
+    # digest is the payload_digest of the whole payload the chunk belongs to; group and parity describe the
+    # parity layout (see parity_helper), 0 when the payload has no parity parts; offset is the chunk's position
+    # in that payload.
+    name_bytes = name.encode("utf-8")
+    preamble = PREAMBLE.pack(MAGIC, VERSION, encode_mode(bits, alpha))
+    header = HEADER.pack(kind, codec, part, total, len(chunk), offset, zlib.crc32(chunk), digest, group, parity,
+                         len(name_bytes))
+    return preamble + header + name_bytes + chunk
+
+
+def hide_part(image, packed: bytes):
+    # Embeds a packed part into a copy of the carrier: the preamble at 1 bit, the rest at the depth it records.
+    pixels = image_to_pixels(image)
+    bits, alpha = decode_mode(packed[PREAMBLE.size - 1])
+
+    # Carriers without transparency get an opaque alpha channel to write into
+    if alpha and pixels.shape[2] == 3:
+        opaque = np.full(pixels.shape[:2] + (1,), 255, dtype=np.uint8)
+        pixels = np.concatenate([pixels, opaque], axis=2)
+
+    embed_bits(pixels, packed[:PREAMBLE.size])
+    embed_bits(pixels, packed[PREAMBLE.size:], bits, alpha, PREAMBLE_PIXELS)
+    return pixels_to_image(pixels)
+
+
+def is_container(pixels):
+    # Returns True when the image's LSB stream starts with the container magic.
+    if channel_capacity(pixels) < len(MAGIC) * 8:
+        return False
+    return extract_bits(pixels, len(MAGIC)) == MAGIC
+
+
+def read_mode(pixels):
+    # Reads the preamble and returns (bits, alpha). Raises ValueError for foreign data or other versions.
+    magic, version, mode = PREAMBLE.unpack(extract_bits(pixels, PREAMBLE.size))
+    if magic != MAGIC:
+        raise ValueError("not a PixelVault container")
+    if version != VERSION:
+        raise ValueError(f"unsupported container version {version}")
+    return decode_mode(mode)
+
+
+def unpack_header(header: bytes):
+    # Parses the fixed header and returns its fields as a dict.
+    kind, codec, part, total, length, offset, crc, digest, group, parity, name_length = HEADER.unpack(header)
+    return {
+        "kind": kind,
+        "codec": codec,
+        "part": part,
+        "total": total,
+        "length": length,
+        "offset": offset,
+        "crc32": crc,
+        "digest": digest,
+        "group": group,
+        "parity": parity,
+        "name_length": name_length,
+    }
+
+
+def leading_pixels(n_bytes, bits=1, alpha=False):
+    # Returns how many pixels hold the preamble plus the first n_bytes stored after it at the given depth.
+    return PREAMBLE_PIXELS + -(-n_bytes * 8 // (bits * (4 if alpha else 3)))
+
+
+def read_part_header(pixels):
+    # Decodes only the preamble, header and name of a container; the chunk itself is never read.
+    # Returns the header dict plus name, bits and alpha.
+    bits, alpha = read_mode(pixels)
+    layout = {"bits": bits, "alpha": alpha, "pixel_offset": PREAMBLE_PIXELS}
+
+    header = unpack_header(extract_bits(pixels, HEADER.size, **layout))
+    name = extract_bits(pixels, header["name_length"], HEADER.size, **layout).decode("utf-8")
+
+    header.update(name=name, bits=bits, alpha=alpha)
+    return header
+
+
+def scan_part(source):
+    # Reads a part's metadata (see read_part_header) from an image path, file object or pixel buffer while
+    # decoding as little of the image as possible: a PNG is only inflated up to the rows holding the header
+    # and name, a small fraction of a full decode. Returns None when the image carries no container.
+    pixels = load_leading_pixels(source, leading_pixels(HEADER.size))
+    if not is_container(pixels):
+        return None
+
+    bits, alpha = read_mode(pixels)
+    layout = {"bits": bits, "alpha": alpha, "pixel_offset": PREAMBLE_PIXELS}
+    name_length = unpack_header(extract_bits(pixels, HEADER.size, **layout))["name_length"]
+
+    # Long names can spill past the rows decoded so far
+    needed = leading_pixels(HEADER.size + name_length, bits, alpha)
+    if pixels.shape[0] * pixels.shape[1] < needed:
+        pixels = load_leading_pixels(source, needed)
+    return read_part_header(pixels)
+
+
+def reveal_part(pixels):
+    # Decodes one container from a pixel buffer, reading only header, name and declared chunk length.
+    header = read_part_header(pixels)
+    layout = {"bits": header["bits"], "alpha": header["alpha"], "pixel_offset": PREAMBLE_PIXELS}
+
+    chunk = extract_bits(pixels, header["length"], HEADER.size + header["name_length"], **layout)
+    if zlib.crc32(chunk) != header["crc32"]:
+        raise ValueError("checksum mismatch")
+
+    header["data"] = chunk
+    return header
@@ -0,0 +1,196 @@
+# dedup_helper.py - Content-addressed chunk store behind deduplicated jobs (config.DEDUP).
+#
+# Payloads are cut into DEDUP_CHUNK_SIZE chunks at fixed offsets, and every chunk is embedded once into
+# CHUNK_STORE_DIR as <sha256 of its raw bytes>.png, compressed on its own. A job folder hard-links the chunk
+# images it needs as its numbered images and keeps a manifest.json naming each part's chunk; readers wrap such
+# images in ChunkImage so the manifest supplies the part fields the shared chunk images cannot carry.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import config
+from helpers.carrier_helper import plan_carriers
+from helpers.container_helper import pack_part, scan_part, KIND_CHUNK
+from helpers.compression_helper import compress_bytes, decompress_bytes
+from helpers import metrics_helper as metrics
+
+MANIFEST_FILE = "manifest.json"
+
+
+def chunk_path(sha256):
+    # Returns where the chunk store keeps the image of a chunk, by its hex SHA-256.
+    return os.path.join(config.CHUNK_STORE_DIR, f"{sha256}.png")
+
+
+def manifest_path(folder):
+    # Returns where a deduplicated job folder keeps the manifest naming each part's chunk.
+    return os.path.join(folder, MANIFEST_FILE)
+
+
+def plan_chunks(payload, payload_size):
+    # Cuts an uncompressed payload (bytes or a binary file object, rewound afterwards) into DEDUP_CHUNK_SIZE
+    # chunks at fixed offsets and returns the job fields of a deduplicated job: "chunks" ({"part", "sha256",
+    # "offset", "length"} per part, hashed over the raw bytes) and a plan whose carrier entry is None for every
+    # chunk the store already holds or an earlier part of the job brings. The others get a carrier for their raw
+    # size, replanned once ChunkWriter has compressed them. Parity is not used: chunk images are shared.
+    # Raises RuntimeError when a chunk does not fit the largest carrier.
+    size = config.DEDUP_CHUNK_SIZE
+    if isinstance(payload, bytes):
+        pieces = (payload[offset:offset + size] for offset in range(0, max(payload_size, 1), size))
+    else:
+        pieces = (payload.read(size) for _ in range(max(1, -(-payload_size // size))))
+
+    chunks, plan, planned = [], [], set()
+    for part, piece in enumerate(pieces, start=1):
+        sha256 = hashlib.sha256(piece).hexdigest()
+        chunks.append({"part": part, "sha256": sha256, "offset": (part - 1) * size, "length": len(piece)})
+        if sha256 in planned or os.path.exists(chunk_path(sha256)):
+            plan.append((None, len(piece)))
+            continue
+        carriers = plan_carriers(len(piece), "")
+        if len(carriers) != 1:
+            raise RuntimeError(f"DEDUP_CHUNK_SIZE ({size} bytes) is more than the largest carrier can hold")
+        plan.append((carriers[0][0], len(piece)))
+        planned.add(sha256)
+
+    if not isinstance(payload, bytes):
+        payload.seek(0)
+    return {"plan": plan, "group": 0, "parity": 0, "chunks": chunks}
+
+
+def link_image(source, target):
+    # Hard-links a chunk image into a job folder, copying it where the file system has no hard links.
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+class ChunkWriter:
+    # Runs the chunk store side of writing a deduplicated job: embed jobs for the chunks the store lacks, each
+    # compressed on its own (its codec goes in the chunk's header) into the smallest carrier that holds it and
+    # written under a temporary name; moving each finished image into the store and linking it into the folder
+    # for every part that uses it; linking the already stored chunks and writing the folder's manifest.
+    # outputs are the folder's image paths in part order, pieces the job's raw chunks in part order.
+
+    def __init__(self, job, outputs, pieces, on_done=None):
+        self.job = job
+        self.outputs = outputs
+        self.pieces = pieces
+        self.on_done = on_done
+        self.temp_names = {}
+        self.parts_by_chunk = {}
+        for chunk in job["chunks"]:
+            self.parts_by_chunk.setdefault(chunk["sha256"], []).append(chunk["part"])
+        self.linked = set()
+
+    def jobs(self):
+        # Yields (part, temporary image path, carrier entry, packed container) for every chunk to embed.
+        os.makedirs(config.CHUNK_STORE_DIR, exist_ok=True)
+        for chunk, (entry, _), piece in zip(self.job["chunks"], self.job["plan"], self.pieces):
+            if entry is None:
+                continue
+            with metrics.stage("compress", chunk["part"], len(piece)):
+                codec, stored = compress_bytes(piece)
+            entry = plan_carriers(len(stored), "")[0][0]
+
+            # Unique per writer, so two jobs embedding the same new chunk (even in one process) never share a file
+            fd, temp = tempfile.mkstemp(prefix=f"{chunk['sha256']}.", suffix=".tmp", dir=config.CHUNK_STORE_DIR)
+            os.close(fd)
+            self.temp_names[temp] = chunk["sha256"]
+            packed = pack_part(KIND_CHUNK, "", 0, 0, stored, codec, config.LSB_BITS, config.LSB_ALPHA,
+                               bytes.fromhex(chunk["sha256"]))
+            yield chunk["part"], temp, entry, packed
+
+    def _link(self, sha256):
+        for part in self.parts_by_chunk[sha256]:
+            if part in self.linked:
+                continue
+            with metrics.stage("link", part):
+                link_image(chunk_path(sha256), self.outputs[part - 1])
+            self.linked.add(part)
+            if self.on_done is not None:
+                self.on_done(self.outputs[part - 1])
+
+    def stored(self, temp):
+        # Publishes a finished chunk image and links it for its parts; the on_done callback of the embed jobs.
+        os.replace(temp, chunk_path(self.temp_names[temp]))
+        self._link(self.temp_names[temp])
+
+    def finish(self, folder):
+        # Links the chunks the store already held and writes the folder's manifest.
+        for sha256 in self.parts_by_chunk:
+            self._link(sha256)
+        job = self.job
+        manifest = {
+            "kind": job["kind"],
+            "name": job["name"],
+            "codec": job["codec"],
+            "digest": job["digest"].hex(),
+            "total": len(job["chunks"]),
+            "chunk_size": config.DEDUP_CHUNK_SIZE,
+            "parts": job["chunks"],
+        }
+        with open(manifest_path(folder), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def discard(self):
+        # Removes the temporary images of a job that failed halfway
+        for temp in self.temp_names:
+            if os.path.exists(temp):
+                os.remove(temp)
+
+
+class ChunkImage:
+    # A deduplicated folder's image: its container only knows its own chunk's hash and codec, so the folder's
+    # manifest supplies the part fields (kind, name, payload codec, part, total, offset, raw length and payload
+    # digest).
+
+    def __init__(self, path, fields):
+        self.path = path
+        self.fields = fields
+
+    def resolve(self, data, check_data=False):
+        # Turns the chunk's header into the part's once the image proves to hold the chunk the manifest names.
+        # With check_data, the chunk is decompressed and its raw bytes checked against the hash.
+        if data["kind"] != KIND_CHUNK or data["digest"].hex() != self.fields["chunk"]:
+            raise ValueError("image does not hold the chunk its folder's manifest names")
+        if check_data:
+            data["data"] = decompress_bytes(data["data"], data["codec"])
+            if hashlib.sha256(data["data"]).hexdigest() != self.fields["chunk"]:
+                raise ValueError("chunk hash mismatch")
+        chunk_codec = data["codec"]
+        data.update(self.fields)
+        data["chunk_codec"] = chunk_codec
+        data["digest"] = bytes.fromhex(self.fields["digest"])
+        del data["chunk"]
+        return data
+
+
+def chunk_sources(folder, sources):
+    # Wraps the reveal jobs (idx, label, path) of a deduplicated folder's images in ChunkImage, with the part
+    # fields its manifest gives; sources of any other folder are returned unchanged.
+    if not os.path.exists(manifest_path(folder)):
+        return sources
+    with open(manifest_path(folder)) as f:
+        manifest = json.load(f)
+    fields = {
+        chunk["part"]: {
+            "kind": manifest["kind"], "name": manifest["name"], "codec": manifest["codec"],
+            "digest": manifest["digest"], "part": chunk["part"], "total": manifest["total"],
+            "offset": chunk["offset"], "length": chunk["length"], "chunk": chunk["sha256"], "group": 0, "parity": 0,
+        }
+        for chunk in manifest["parts"]
+    }
+    return [(idx, label, ChunkImage(path, fields[idx]) if idx in fields else path) for idx, label, path in sources]
+
+
+def scan_source(source):
+    # scan_part for a reveal source, resolving chunk images through their manifest.
+    if isinstance(source, ChunkImage):
+        meta = scan_part(source.path)
+        return meta if meta is None else source.resolve(meta)
+    return scan_part(source)
@@ -17,15 +17,6 @@ def list_folders(base_path):
     return sorted(folders)
 
 
-def get_next_folder_index(base_path, prefix=config.FOLDER_PREFIX):
-    # Returns the next available folder index based on the given base path and prefix.
-
-    index = 1
-    while os.path.isdir(os.path.join(base_path, f"{prefix}{index}")):
-        index += 1
-    return index
-
-
 def find_numbered_images(folder_path, pattern=config.FILE_PATTERN):
     # Finds numbered output images in a folder and returns a sorted list of (number, filename).
     if not os.path.isdir(folder_path):
@@ -9,24 +9,10 @@ INPUT_FILES_DIR = config.INPUT_FILES_DIR
 
 
 def create_directory_structure():
-
-    # Verify if the OUTPUT_DIR exists, if not create it
-    if os.path.exists(OUTPUT_DIR):
-        return
-    else:
-        os.makedirs(OUTPUT_DIR)
-        print(f"Directory '{OUTPUT_DIR}' created.")
-
-    # Verify if the OUTPUT_TEMP_FILE exists, if not create it
-    if os.path.exists(OUTPUT_TEMP_FILES):
-        return
-    else:
-        os.makedirs(OUTPUT_TEMP_FILES)
-        print(f"Directory '{OUTPUT_TEMP_FILES}' created.")
-
-    # Verify if the INPUT_FILES_DIR exists, if not create it
-    if os.path.exists(INPUT_FILES_DIR):
-        return
-    else:
-        os.makedirs(INPUT_FILES_DIR)
-        print(f"Directory '{INPUT_FILES_DIR}' created.")
\ No newline at end of file
+    # Creates the output, temp and input directories that do not exist yet and returns the ones it created.
+    created = []
+    for directory in (OUTPUT_DIR, OUTPUT_TEMP_FILES, INPUT_FILES_DIR):
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+            created.append(directory)
+    return created
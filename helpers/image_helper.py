@@ -6,8 +6,8 @@ import requests
 import config
 
 
-def download_random_dog_image(output_path=config.TEMP_IMAGE):
-   # Downloads a random dog image from the API, saves it as PNG, and returns success status.
+def fetch_random_dog_image():
+   # Downloads a random dog image from the API and returns it as an RGB PIL image in memory, or None on failure.
 
     try:
         # Get random dog image URL
@@ -21,27 +21,15 @@ def download_random_dog_image(output_path=config.TEMP_IMAGE):
 
         # Open image from memory and convert to RGB
         img = Image.open(BytesIO(img_response.content))
-        img = img.convert("RGB")
+        return img.convert("RGB")
 
-        # Save as PNG
-        img.save(output_path, format="PNG")
-        
-        return True
+    except Exception:
+        return None
 
-    except Exception as e:
-        print(f"Error downloading image: {e}")
-        return False
 
-
-def calculate_capacity(image_path, safety_factor=config.SAFETY_FACTOR):
-    # Calculates usable byte capacity for LSB 1-bit/channel RGB steganography with a safety margin.
-
-    try:
-        with Image.open(image_path) as img:
-            width, height = img.size
-            raw_capacity = (width * height * 3) // 8  # Theoretical bytes
-            usable_capacity = int(raw_capacity * safety_factor)
-            return max(0, usable_capacity)
-    except Exception as e:
-        print(f"Error calculating capacity: {e}")
-        return 0
+def png_save_options(profile=None):
+    # Returns the Pillow PNG save options for an encoding profile from config.PNG_PROFILES.
+    profile = config.PNG_PROFILE if profile is None else profile
+    if profile not in config.PNG_PROFILES:
+        raise ValueError(f"unknown PNG profile '{profile}' (choose from {', '.join(config.PNG_PROFILES)})")
+    return dict(config.PNG_PROFILES[profile])
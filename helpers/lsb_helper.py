@@ -0,0 +1,130 @@
+# lsb_helper.py - Vectorized LSB steganography on NumPy pixel buffers.
+
+import numpy as np
+from PIL import Image
+
+
+def image_to_pixels(image):
+    # Loads an image (path, file object or PIL image) into a writable uint8 array of shape (H, W, C).
+    # An already decoded array is just copied, which is far cheaper than decoding the PNG again.
+    if isinstance(image, np.ndarray):
+        return image.copy()
+
+    if isinstance(image, Image.Image):
+        img = image
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        return np.array(img, dtype=np.uint8)
+
+    with Image.open(image) as img:
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        return np.array(img, dtype=np.uint8)
+
+
+def pixels_to_image(pixels):
+    # Wraps a (H, W, 3|4) uint8 array back into a PIL image.
+    return Image.fromarray(pixels)
+
+
+def _data_channels(pixels, alpha):
+    # Returns how many channels per pixel carry data: RGB, or RGBA when alpha embedding is requested.
+    if alpha and pixels.shape[2] < 4:
+        raise ValueError("alpha embedding needs an RGBA image")
+    return 4 if alpha else 3
+
+
+def channel_capacity(pixels, alpha=False, pixel_offset=0):
+    # Returns how many channel values (RGB, or RGBA with alpha) are available from pixel_offset on.
+    height, width = pixels.shape[:2]
+    return max(0, height * width - pixel_offset) * _data_channels(pixels, alpha)
+
+
+def embed_bits(pixels, data: bytes, bits=1, alpha=False, pixel_offset=0):
+    # Writes data (MSB first) into the low `bits` bits of each RGB(A) channel, in place, in raster order.
+    channels = _data_channels(pixels, alpha)
+    stream = np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+    # Pad to whole pixels with zero bits; for 1 bit over RGB this is exactly stegano's padding
+    group = bits * channels
+    padding = (group - len(stream) % group) % group
+    if padding:
+        stream = np.concatenate([stream, np.zeros(padding, dtype=np.uint8)])
+
+    n_values = len(stream) // bits
+    if n_values > channel_capacity(pixels, alpha, pixel_offset):
+        raise ValueError(f"The message you want to hide is too long: {len(data)} bytes")
+
+    # Group the bit stream into one `bits`-wide value per channel
+    if bits == 1:
+        values = stream
+    else:
+        values = np.packbits(stream.reshape(-1, bits), axis=1).reshape(-1) >> (8 - bits)
+
+    n_pixels = n_values // channels
+    block = pixels.reshape(-1, pixels.shape[2])[pixel_offset:pixel_offset + n_pixels, :channels]
+    keep_mask = np.uint8(0xFF ^ ((1 << bits) - 1))
+    block[...] = (block & keep_mask) | values.reshape(n_pixels, channels)
+    return pixels
+
+
+def hide_message(image, message: str, encoding="utf-8"):
+    # Hides a text message using stegano's "<length>:<message>" layout so lsb.reveal can still read it.
+    message_bytes = message.encode(encoding)
+    if not message_bytes:
+        raise ValueError("message length is zero")
+
+    stream = f"{len(message_bytes)}:".encode("ascii") + message_bytes
+    pixels = image_to_pixels(image)
+    embed_bits(pixels, stream)
+    return pixels_to_image(pixels)
+
+
+def extract_bits(pixels, n_bytes, byte_offset=0, bits=1, alpha=False, pixel_offset=0):
+    # Reads n_bytes from the low `bits` bits of the RGB(A) channels starting at byte_offset,
+    # touching only the pixels that hold them.
+    channels = _data_channels(pixels, alpha)
+    start = byte_offset * 8
+    end = start + n_bytes * 8
+    if end > channel_capacity(pixels, alpha, pixel_offset) * bits:
+        raise ValueError("Impossible to detect message.")
+
+    first_pixel = start // bits // channels
+    last_pixel = -(-(-(-end // bits)) // channels)
+    block = pixels.reshape(-1, pixels.shape[2])[pixel_offset + first_pixel:pixel_offset + last_pixel, :channels]
+    values = block.reshape(-1) & ((1 << bits) - 1)
+
+    if bits == 1:
+        stream = values
+    else:
+        stream = np.unpackbits(values[:, None], axis=1)[:, 8 - bits:].reshape(-1)
+
+    skip = start - first_pixel * channels * bits
+    return np.packbits(stream[skip:skip + n_bytes * 8]).tobytes()
+
+
+def reveal_bytes(image):
+    # Reads a stegano-layout "<length>:<message>" stream and returns the message bytes, stopping at the declared length.
+    pixels = image if isinstance(image, np.ndarray) else image_to_pixels(image)
+
+    # The prefix can never be longer than the digits of the image's byte capacity plus ":"
+    max_prefix = len(str(channel_capacity(pixels) // 8)) + 1
+    head = extract_bits(pixels, min(max_prefix, channel_capacity(pixels) // 8))
+    digits, sep, _ = head.partition(b":")
+    if not sep or not digits.isdigit():
+        raise ValueError("Impossible to detect message.")
+
+    return extract_bits(pixels, int(digits), byte_offset=len(digits) + 1)
+
+
+def reveal_message(image, encoding="utf-8", compat=False):
+    # Returns the hidden text message from an image written by hide_message or stegano.lsb.hide.
+    # With compat=True, images the bulk decoder cannot parse are retried with stegano's own reveal.
+    try:
+        return reveal_bytes(image).decode(encoding)
+    except (ValueError, UnicodeDecodeError) as exc:
+        if not compat:
+            raise ValueError("Impossible to detect message.") from exc
+
+    from stegano import lsb
+    return lsb.reveal(pixels_to_image(image) if isinstance(image, np.ndarray) else image)
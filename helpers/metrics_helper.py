@@ -0,0 +1,209 @@
+# metrics_helper.py - Optional per-stage instrumentation: wall time, CPU time, bytes and peak memory per stage and part.
+#
+# Code marks its stages with `with stage("embed", part, n_bytes):`. Records are only taken while a collector is
+# active: a job() opened by a front-end (when config.METRICS is set or a hook is registered), or a capture()
+# around a job running in a pool worker, whose records travel back with its result. Without one, stage()
+# returns a shared no-op context, so disabled instrumentation costs a function call per stage.
+
+import csv
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import config
+
+FIELDS = ["stage", "part", "wall_seconds", "cpu_seconds", "bytes", "peak_bytes", "pid"]
+
+_collectors = []
+_hooks = []
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add_bytes(self, n_bytes):
+        pass
+
+
+_NULL = _NullStage()
+
+
+class _Collector:
+    def __init__(self, hooks):
+        self.records = []
+        self._hooks = hooks
+        # Running peak of each open stage; a nested stage resets tracemalloc's peak, so it hands its own up
+        self.peaks = []
+
+    def add(self, record):
+        self.records.append(record)
+        if self._hooks:
+            for hook in _hooks:
+                hook(record)
+
+
+class _Stage:
+    __slots__ = ("collector", "name", "part", "n_bytes", "wall", "cpu")
+
+    def __init__(self, collector, name, part, n_bytes):
+        self.collector = collector
+        self.name = name
+        self.part = part
+        self.n_bytes = n_bytes
+
+    def __enter__(self):
+        peaks = self.collector.peaks
+        if peaks:
+            peaks[-1] = max(peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        peaks.append(0)
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        peaks = self.collector.peaks
+        peak = max(peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if peaks:
+            peaks[-1] = max(peaks[-1], peak)
+
+        self.collector.add({
+            "stage": self.name,
+            "part": self.part,
+            "wall_seconds": wall,
+            "cpu_seconds": cpu,
+            "bytes": self.n_bytes,
+            "peak_bytes": peak,
+            "pid": os.getpid(),
+        })
+        return False
+
+    def add_bytes(self, n_bytes):
+        # For stages that only learn their size at the end.
+        self.n_bytes += n_bytes
+
+
+def enabled():
+    # Returns True while records are being collected.
+    return bool(_collectors)
+
+
+def stage(name, part=None, n_bytes=0):
+    # Times one stage for the active collector; a no-op context when nothing collects.
+    if not _collectors:
+        return _NULL
+    return _Stage(_collectors[-1], name, part, n_bytes)
+
+
+def add_hook(hook):
+    # Registers hook(record) to be called for every record of every job, which also turns collection on.
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    _hooks.remove(hook)
+
+
+def merge(records):
+    # Adds records measured elsewhere (a pool worker) to the active collector.
+    if _collectors:
+        for record in records:
+            _collectors[-1].add(record)
+
+
+@contextmanager
+def _collect(hooks):
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    collector = _Collector(hooks)
+    _collectors.append(collector)
+    try:
+        yield collector.records
+    finally:
+        _collectors.pop()
+        if started:
+            tracemalloc.stop()
+
+
+def job():
+    # Collects the records of one job when config.METRICS is set or a hook is registered; yields the record
+    # list (always empty when disabled). Hooks see each record as it arrives.
+    if not (config.METRICS or _hooks):
+        return nullcontext([])
+    return _collect(hooks=True)
+
+
+def capture(active):
+    # Collects the records of work running in a pool worker so they can be returned to the parent.
+    if not active:
+        return nullcontext([])
+    return _collect(hooks=False)
+
+
+def summarize(records):
+    # Totals records per stage, in first-seen order: count, wall and CPU seconds, bytes, MB/s and peak bytes.
+    stages = {}
+    for record in records:
+        total = stages.setdefault(record["stage"], {
+            "stage": record["stage"], "count": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "bytes": 0,
+            "peak_bytes": 0,
+        })
+        total["count"] += 1
+        total["wall_seconds"] += record["wall_seconds"]
+        total["cpu_seconds"] += record["cpu_seconds"]
+        total["bytes"] += record["bytes"]
+        total["peak_bytes"] = max(total["peak_bytes"], record["peak_bytes"])
+
+    for total in stages.values():
+        seconds = total["wall_seconds"]
+        total["mb_per_s"] = total["bytes"] / (1024 * 1024) / seconds if seconds > 0 and total["bytes"] else None
+    return list(stages.values())
+
+
+def write_report(records, folder, name, report_format=None):
+    # Writes <folder>/metrics_<name>.json (summary and records) or .csv (one row per record) and returns its
+    # path. report_format defaults to config.METRICS_REPORT while config.METRICS is on, so jobs collected only
+    # for a hook leave no files behind. Returns None when there is nothing to write.
+    report_format = report_format or (config.METRICS and config.METRICS_REPORT)
+    if not records or not report_format:
+        return None
+
+    path = os.path.join(folder, f"metrics_{name}.{report_format}")
+    if report_format == "csv":
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with open(path, "w") as f:
+            json.dump({"summary": summarize(records), "records": records}, f, indent=2)
+    return path
+
+
+def metrics_table(records):
+    # Builds a rich table of the per-stage summary for console front-ends.
+    from rich.table import Table
+
+    table = Table(title="Stage metrics", title_justify="left", box=None)
+    for column in ("Stage", "Count", "Wall (s)", "CPU (s)", "MB", "MB/s", "Peak MB"):
+        table.add_column(column, justify="left" if column == "Stage" else "right")
+    for total in summarize(records):
+        table.add_row(
+            total["stage"],
+            str(total["count"]),
+            f"{total['wall_seconds']:.3f}",
+            f"{total['cpu_seconds']:.3f}",
+            f"{total['bytes'] / (1024 * 1024):.2f}" if total["bytes"] else "",
+            f"{total['mb_per_s']:.1f}" if total["mb_per_s"] else "",
+            f"{total['peak_bytes'] / (1024 * 1024):.1f}",
+        )
+    return table
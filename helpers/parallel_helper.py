@@ -0,0 +1,105 @@
+# parallel_helper.py - Helper functions to spread independent per-image jobs across a process pool.
+
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import config
+from helpers import metrics_helper as metrics
+
+
+def resolve_workers(workers=None, jobs_count=None):
+    # Returns the effective worker count (0 means one per CPU core), never more than the number of jobs.
+    if workers is None:
+        workers = config.WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    if jobs_count is not None:
+        workers = min(workers, max(1, jobs_count))
+    return workers
+
+
+def _measured(job):
+    # Runs func(job) in a worker with instrumentation on and returns (result, records) for the parent.
+    func, inner = job
+    with metrics.capture(True) as records:
+        result = func(inner)
+    return result, records
+
+
+class WorkerPool:
+    # Keeps worker processes, and whatever their initializer set up, alive across several batches of jobs.
+    # With one worker, jobs run in-process and the initializer runs once here.
+
+    def __init__(self, workers=1, initializer=None, initargs=()):
+        self.workers = workers
+        self._executor = None
+        if workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs)
+        elif initializer is not None:
+            initializer(*initargs)
+
+    def map(self, func, jobs, on_done=None):
+        # Runs func(job) for every job and calls on_done(result) as each one finishes, in completion order.
+        # Jobs are pulled lazily so at most two per worker are in flight at any time. Returns the results.
+        results = []
+
+        def collect(result):
+            results.append(result)
+            if on_done is not None:
+                on_done(result)
+
+        if self._executor is None:
+            for job in jobs:
+                collect(func(job))
+            return results
+
+        # While metrics are collected, workers measure their stages and return the records with each result
+        measure = metrics.enabled()
+
+        def finish(future):
+            if measure:
+                result, records = future.result()
+                metrics.merge(records)
+                collect(result)
+            else:
+                collect(future.result())
+
+        pending = set()
+        for job in jobs:
+            if len(pending) >= self.workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future)
+            if measure:
+                pending.add(self._executor.submit(_measured, (func, job)))
+            else:
+                pending.add(self._executor.submit(func, job))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(future)
+
+        return results
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run_parallel(func, jobs, workers=1, on_done=None, initializer=None, initargs=(), pool=None):
+    # Runs func(job) for every job on a short-lived WorkerPool (see WorkerPool.map). initializer(*initargs)
+    # runs once per worker to set up shared read-only state. An open pool can be passed to reuse its
+    # workers instead; its own initializer has already run, so initializer and initargs are then ignored.
+    if pool is not None:
+        return pool.map(func, jobs, on_done)
+
+    with WorkerPool(workers, initializer, initargs) as pool:
+        return pool.map(func, jobs, on_done)
@@ -0,0 +1,199 @@
+# parity_helper.py - Reed-Solomon erasure coding over GF(256): parity parts that rebuild lost data parts.
+#
+# Data parts are split into groups of `group` consecutive parts, and every group gets `parity` extra parts.
+# Any `parity` parts of a group (data or parity) can be lost and rebuilt from the rest. The code is systematic
+# (data parts are stored unchanged) and uses a Cauchy matrix, so every square submatrix is invertible.
+# Parity part numbers follow the data parts: group 0's parity parts are total+1 .. total+parity, and so on.
+
+import struct
+
+import numpy as np
+
+# Every row of the code is a data chunk behind its 4-byte length, zero-padded to the group's widest row, so
+# rebuilt chunks come back with their exact length
+LENGTH = struct.Struct(">I")
+
+_POLYNOMIAL = 0x11D
+
+
+def _build_tables():
+    exp = [0] * 510
+    log = [0] * 256
+    value = 1
+    for power in range(255):
+        exp[power] = exp[power + 255] = value
+        log[value] = power
+        value <<= 1
+        if value & 0x100:
+            value ^= _POLYNOMIAL
+    return exp, log
+
+
+_EXP, _LOG = _build_tables()
+
+# Full multiplication table: MUL[c][data] multiplies a whole byte array by c with one vectorized lookup
+_logs = np.array(_LOG)
+MUL = np.array(_EXP, dtype=np.uint8)[(_logs[:, None] + _logs[None, :]) % 255]
+MUL[0, :] = 0
+MUL[:, 0] = 0
+
+
+def _gf_mul(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return _EXP[_LOG[a] + _LOG[b]]
+
+
+def _gf_inv(a):
+    return _EXP[255 - _LOG[a]]
+
+
+def _coefficient(j, i, parity):
+    # Cauchy matrix entry for parity row j and data row i: 1 / (x_j + y_i) with x_j = j and y_i = parity + i.
+    return _gf_inv(j ^ (parity + i))
+
+
+def check_layout(group, parity):
+    # Raises ValueError for a parity layout the code cannot build.
+    if group < 1 or parity < 1:
+        raise ValueError("parity groups need at least one data part and one parity part")
+    if group + parity > 256:
+        raise ValueError("data parts plus parity parts per group cannot exceed 256")
+
+
+def parity_count(total, group, parity):
+    # Returns how many parity parts protect total data parts (0 when parity is off).
+    if not group or not parity:
+        return 0
+    return -(-total // group) * parity
+
+
+def group_parts(index, total, group):
+    # Returns the data part numbers of group index (0-based).
+    return list(range(index * group + 1, min((index + 1) * group, total) + 1))
+
+
+def parity_parts(index, total, parity):
+    # Returns the parity part numbers of group index (0-based).
+    first = total + index * parity + 1
+    return list(range(first, first + parity))
+
+
+def recoverable_parts(missing, present, total, group, parity):
+    # Returns the missing data parts that can be rebuilt, given every part number present (data and parity).
+    recoverable = []
+    if not group or not parity:
+        return recoverable
+    for index in sorted({(part - 1) // group for part in missing}):
+        lost = [part for part in group_parts(index, total, group) if part not in present]
+        available = sum(1 for part in parity_parts(index, total, parity) if part in present)
+        if len(lost) <= available:
+            recoverable.extend(part for part in lost if part in missing)
+    return recoverable
+
+
+def recovery_reads(missing, present, total, group, parity):
+    # Plans the rebuild of missing data parts from every part number present (data and parity). Returns
+    # (groups, needed): the 0-based groups that can be rebuilt, and the parts to read for them, which per group
+    # are every surviving data part plus as many parity parts as there are lost data parts.
+    rebuildable = recoverable_parts(missing, present, total, group, parity)
+    groups = sorted({(part - 1) // group for part in rebuildable})
+    needed = set()
+    for index in groups:
+        members = group_parts(index, total, group)
+        lost = sum(1 for part in members if part not in present)
+        needed.update(part for part in members if part in present)
+        needed.update([part for part in parity_parts(index, total, parity) if part in present][:lost])
+    return groups, needed
+
+
+def rebuild_groups(chunks, groups, total, group, parity):
+    # Rebuilds the lost data parts of groups from {part number: chunk} holding what recovery_reads asked for.
+    # Returns ({part number: rebuilt chunk}, error messages for groups that could not be rebuilt).
+    recovered = {}
+    errors = []
+    for index in groups:
+        members = group_parts(index, total, group)
+        first_parity = parity_parts(index, total, parity)[0]
+        parities = {part - first_parity: chunks[part] for part in parity_parts(index, total, parity) if part in chunks}
+        try:
+            rebuilt = recover_chunks([chunks.get(part) for part in members], parities, parity)
+        except ValueError as e:
+            errors.append(f"parity group {index + 1}: {e}")
+            continue
+        recovered.update((members[position], chunk) for position, chunk in rebuilt.items())
+    return recovered, errors
+
+
+def _rows(chunks, width):
+    rows = np.zeros((len(chunks), width), dtype=np.uint8)
+    for row, chunk in zip(rows, chunks):
+        row[:LENGTH.size] = np.frombuffer(LENGTH.pack(len(chunk)), dtype=np.uint8)
+        row[LENGTH.size:LENGTH.size + len(chunk)] = np.frombuffer(chunk, dtype=np.uint8)
+    return rows
+
+
+def encode_parity(chunks, parity):
+    # Returns the parity chunks of one group of data chunks; each is 4 bytes longer than the longest data chunk.
+    check_layout(len(chunks), parity)
+    rows = _rows(chunks, LENGTH.size + max(len(chunk) for chunk in chunks))
+
+    parities = []
+    for j in range(parity):
+        acc = np.zeros(rows.shape[1], dtype=np.uint8)
+        for i, row in enumerate(rows):
+            acc ^= MUL[_coefficient(j, i, parity)][row]
+        parities.append(acc.tobytes())
+    return parities
+
+
+def _invert(matrix):
+    # Gauss-Jordan inversion of a small square matrix over GF(256), on Python ints.
+    n = len(matrix)
+    rows = [list(row) + [int(i == k) for k in range(n)] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = next(r for r in range(col, n) if rows[r][col])
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        scale = _gf_inv(rows[col][col])
+        rows[col] = [_gf_mul(scale, value) for value in rows[col]]
+        for r in range(n):
+            factor = rows[r][col]
+            if r != col and factor:
+                rows[r] = [value ^ _gf_mul(factor, pivot_value) for value, pivot_value in zip(rows[r], rows[col])]
+    return [row[n:] for row in rows]
+
+
+def recover_chunks(chunks, parities, parity):
+    # Rebuilds the lost data chunks of one group. chunks lists the group's data chunks in order, None where
+    # lost; parities maps parity row numbers (0-based) to the parity chunks that survived.
+    # Returns {position in chunks: rebuilt chunk}. Raises ValueError when too few parity chunks survived.
+    lost = [i for i, chunk in enumerate(chunks) if chunk is None]
+    if not lost:
+        return {}
+    if len(parities) < len(lost):
+        raise ValueError(f"{len(lost)} parts lost but only {len(parities)} parity parts available")
+
+    used = sorted(parities)[:len(lost)]
+    width = len(parities[used[0]])
+    known = [i for i, chunk in enumerate(chunks) if chunk is not None]
+    rows = _rows([chunks[i] for i in known], width)
+
+    # Remove the surviving data rows from each parity row, leaving a combination of the lost rows only
+    residuals = []
+    for j in used:
+        acc = np.frombuffer(parities[j], dtype=np.uint8).copy()
+        for i, row in zip(known, rows):
+            acc ^= MUL[_coefficient(j, i, parity)][row]
+        residuals.append(acc)
+
+    inverse = _invert([[_coefficient(j, i, parity) for i in lost] for j in used])
+    recovered = {}
+    for i, coefficients in zip(lost, inverse):
+        acc = np.zeros(width, dtype=np.uint8)
+        for c, residual in zip(coefficients, residuals):
+            acc ^= MUL[c][residual]
+        length = LENGTH.unpack(acc[:LENGTH.size].tobytes())[0]
+        if length > width - LENGTH.size:
+            raise ValueError("parity data is inconsistent")
+        recovered[i] = acc[LENGTH.size:LENGTH.size + length].tobytes()
+    return recovered
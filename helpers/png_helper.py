@@ -0,0 +1,121 @@
+# png_helper.py - Partial PNG reader that inflates and unfilters only the leading rows of an image.
+
+import io
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from helpers.lsb_helper import image_to_pixels
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+CHUNK_HEADER = struct.Struct(">I4s")
+IHDR = struct.Struct(">IIBBBBB")
+
+# Bytes per pixel for the 8-bit, non-interlaced colour types read here: RGB and RGBA (what this tool writes)
+_CHANNELS = {2: 3, 6: 4}
+
+
+def _open_source(source):
+    # Returns (binary file object, whether we opened it) for a path, bytes or file object.
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb"), True
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source), True
+    return source, False
+
+
+def _unfilter_row(filter_type, row, prior, bpp):
+    # Reverses one PNG scanline filter (RFC 2083, section 6) and returns the raw row as uint8.
+    if filter_type == 0:
+        return row
+    if filter_type == 1:
+        return np.cumsum(row.reshape(-1, bpp), axis=0, dtype=np.uint8).reshape(-1)
+    if filter_type == 2:
+        return row + prior
+
+    # Average and Paeth depend on the byte just decoded, so they run byte by byte on Python ints
+    raw = row.tolist()
+    up = prior.tolist()
+    if filter_type == 3:
+        for i in range(len(raw)):
+            left = raw[i - bpp] if i >= bpp else 0
+            raw[i] = (raw[i] + ((left + up[i]) >> 1)) & 0xFF
+    elif filter_type == 4:
+        for i in range(len(raw)):
+            if i >= bpp:
+                a, c = raw[i - bpp], up[i - bpp]
+            else:
+                a = c = 0
+            b = up[i]
+            p = a + b - c
+            pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+            predictor = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+            raw[i] = (raw[i] + predictor) & 0xFF
+    else:
+        raise ValueError(f"invalid PNG filter type {filter_type}")
+    return np.array(raw, dtype=np.uint8)
+
+
+def read_png_rows(source, n_pixels):
+    # Decodes just enough leading rows of a PNG (path, bytes or binary file object) to cover its first n_pixels
+    # pixels, reading and inflating only the IDAT data those rows need. Returns a (rows, W, C) uint8 array, or
+    # None for PNGs this reader does not handle (interlaced, palette, grayscale or 16-bit), which need a full decode.
+    f, owned = _open_source(source)
+    try:
+        if f.read(8) != PNG_SIGNATURE:
+            return None
+
+        length, chunk_type = CHUNK_HEADER.unpack(f.read(CHUNK_HEADER.size))
+        if chunk_type != b"IHDR":
+            return None
+        width, height, depth, color_type, _, _, interlace = IHDR.unpack(f.read(IHDR.size))
+        f.read(length - IHDR.size + 4)
+        if depth != 8 or interlace != 0 or color_type not in _CHANNELS:
+            return None
+
+        bpp = _CHANNELS[color_type]
+        stride = width * bpp
+        n_rows = min(height, max(1, -(-n_pixels // width)))
+        needed = n_rows * (stride + 1)
+
+        inflater = zlib.decompressobj()
+        raw = bytearray()
+        while len(raw) < needed:
+            header = f.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                raise ValueError("truncated PNG")
+            length, chunk_type = CHUNK_HEADER.unpack(header)
+            if chunk_type == b"IEND":
+                raise ValueError("truncated PNG image data")
+            data = f.read(length)
+            f.read(4)
+            if chunk_type == b"IDAT":
+                raw += inflater.decompress(data, needed - len(raw))
+                # max_length may leave input behind; drain it only while rows are still missing
+                while inflater.unconsumed_tail and len(raw) < needed:
+                    raw += inflater.decompress(inflater.unconsumed_tail, needed - len(raw))
+    finally:
+        if owned:
+            f.close()
+
+    rows = np.frombuffer(bytes(raw[:needed]), dtype=np.uint8).reshape(n_rows, stride + 1)
+    pixels = np.empty((n_rows, stride), dtype=np.uint8)
+    prior = np.zeros(stride, dtype=np.uint8)
+    for y in range(n_rows):
+        prior = pixels[y] = _unfilter_row(rows[y, 0], rows[y, 1:], prior, bpp)
+    return pixels.reshape(n_rows, width, bpp)
+
+
+def load_leading_pixels(source, n_pixels):
+    # Returns a pixel array holding at least the first n_pixels pixels of an image in raster order: PNG files are
+    # only decoded that far, anything else (other formats, PIL images, arrays) is loaded in full.
+    if isinstance(source, (str, os.PathLike, bytes, bytearray, memoryview)) or hasattr(source, "read"):
+        start = source.tell() if hasattr(source, "read") else None
+        pixels = read_png_rows(source, n_pixels)
+        if start is not None:
+            source.seek(start)
+        if pixels is not None:
+            return pixels
+    return image_to_pixels(source)
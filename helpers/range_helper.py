@@ -0,0 +1,80 @@
+# range_helper.py - Byte-range arithmetic: which parts hold a range of a payload, and cutting it out of them.
+#
+# Every part records where its chunk starts in the stored payload, and every data part but the last holds the
+# same number of bytes, so one header is enough to locate the parts a range needs. Ranges are [start, end),
+# with end None meaning up to the end of the payload. api.read_range reveals the parts these functions name.
+
+
+def pick_header(metas):
+    # Returns the header to locate ranges from, among part headers (None for unreadable images) taken lazily:
+    # the first data part before the last, since its length is the size every data part but the last holds,
+    # else the first data part seen. Returns None when no header is usable.
+    found = None
+    for meta in metas:
+        if meta is None or meta["part"] > meta["total"]:
+            continue
+        if meta["part"] < meta["total"] or meta["total"] == 1:
+            return meta
+        found = found or meta
+    return found
+
+
+def range_parts(start, end, total, part_size):
+    # Returns the data parts holding [start, end) when every data part but the last holds part_size bytes.
+    last = total if end is None else (max(start, end - 1) // part_size) + 1
+    return list(range(min(start // part_size + 1, total), min(last, total) + 1))
+
+
+def offsets_match(offsets, part_size):
+    # Returns True when {part: offset} read from headers agrees with the layout range_parts assumes.
+    return all(offset == (part - 1) * part_size for part, offset in offsets.items())
+
+
+def span_parts(offsets, start, end, total):
+    # Returns the data parts holding [start, end) from the {part: offset} headers actually read: from the last
+    # part starting at or before start to the part before the first one starting at or after end. Parts in
+    # between whose header could not be read are included, so they can still be rebuilt from parity.
+    low = max((part for part, offset in offsets.items() if offset <= start), default=1)
+    high = min((part - 1 for part, offset in offsets.items() if end is not None and offset >= end), default=total)
+    return list(range(low, max(low, high) + 1))
+
+
+def join_range(chunks, start, end):
+    # Cuts [start, end) out of {part: (offset, data)}: the contiguous run of parts covering start is joined, and
+    # a gap cuts the range short. Returns the bytes found, empty when no part covers start.
+    data = bytearray()
+    first = position = None
+    for part in sorted(chunks):
+        offset, chunk = chunks[part]
+        if position is not None and offset != position:
+            break
+        if position is None:
+            if offset > start:
+                break
+            first = position = offset
+        data += chunk
+        position += len(chunk)
+    if first is None:
+        return b""
+    return bytes(data[start - first:None if end is None else end - first])
+
+
+class RangeCutter:
+    # Keeps [start, end) of a stream fed piece by piece in order, such as a payload being decompressed, and
+    # drops everything else.
+
+    def __init__(self, start, end=None):
+        self.start = start
+        self.end = end
+        self.position = 0
+        self.data = bytearray()
+
+    def take(self, piece):
+        high = len(piece) if self.end is None else self.end - self.position
+        self.data.extend(piece[max(self.start - self.position, 0):max(high, 0)])
+        self.position += len(piece)
+
+    @property
+    def done(self):
+        # True once the stream has passed the end of the range
+        return self.end is not None and self.position >= self.end
@@ -1,7 +1,15 @@
 # main.py - Main entry point for the Image Steganography Tool.
 
+import argparse
+import json
+import os
+import sys
+
+import config
+import batch
+from api import search_folders, rebuild_catalog
 from reader import read_image
-from writer import write_image, hide_archive_in_image
+from writer import write_image, hide_archive_in_image, manage_carrier_pool
 from rich.panel import Panel
 from rich.table import Table
 from rich.console import Console
@@ -26,12 +34,158 @@ def show_menu():
     table.add_row("[bold green]1[/bold green]", "Read text from images or extract hidden files")
     table.add_row("[bold green]2[/bold green]", "Create new images with hidden text")
     table.add_row("[bold green]3[/bold green]", "Hide a file inside images (supports large files)")
+    table.add_row("[bold green]4[/bold green]", "Manage carrier image pool")
     table.add_row("[bold red]Enter[/bold red]", "Exit")
     console.print("\n[bold]Choose an option:[/bold]\n")
     console.print(table)
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Hide and extract text or files within images using LSB steganography. "
+                    "Without a command, the interactive menu starts."
+    )
+    parser.add_argument("--png-profile", choices=sorted(config.PNG_PROFILES), default=config.PNG_PROFILE,
+                        help="PNG encoding profile for generated images (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=config.WORKERS,
+                        help="worker processes, 0 for one per CPU core (default: %(default)s)")
+
+    parser.add_argument("--metrics", choices=["json", "csv"],
+                        help="record per-stage time, CPU, bytes and peak memory of every job and save them as "
+                             "metrics_<job>.json or .csv in its folder")
+
+    parser.add_argument("--dedup", action="store_true", default=config.DEDUP,
+                        help="store payloads as content-addressed chunks shared across jobs, so re-hiding "
+                             "unchanged data embeds nothing new")
+    parser.add_argument("--parity", type=int, default=config.PARITY_PARTS,
+                        help="parity images per group, so that many lost images per group can be rebuilt "
+                             "(default: %(default)s, off)")
+    parser.add_argument("--parity-group", type=int, default=config.PARITY_GROUP,
+                        help="data images per parity group (default: %(default)s)")
+
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    hide_text = commands.add_parser("hide-text", help="hide text files (or --text) in new text_N folders")
+    hide_text.add_argument("inputs", nargs="*", help="UTF-8 text files, directories or globs; '-' reads stdin")
+    hide_text.add_argument("--text", help="hide this text instead of reading files")
+    hide_text.add_argument("--title", help="title stored with the text (default: the file name)")
+
+    hide_file = commands.add_parser("hide-file", help="hide files in new archive_N folders, one per file")
+    hide_file.add_argument("inputs", nargs="+", help="files, directories or globs")
+    hide_file.add_argument("--no-base64", action="store_true", help="skip the Base64 backup file")
+
+    extract = commands.add_parser("extract", help="rebuild the text or file hidden in output folders")
+    extract.add_argument("inputs", nargs="+", help="output folders or globs; a parent folder covers its subfolders")
+    extract.add_argument("--output", help="write results here instead of inside each folder")
+
+    extract_range = commands.add_parser("extract-range",
+                                        help="extract a byte range of hidden payloads, revealing only the images "
+                                             "that hold it")
+    extract_range.add_argument("inputs", nargs="+",
+                               help="output folders or globs; a parent folder covers its subfolders")
+    extract_range.add_argument("--start", type=int, default=0, help="first byte to extract (default: %(default)s)")
+    span = extract_range.add_mutually_exclusive_group()
+    span.add_argument("--length", type=int, help="number of bytes to extract (default: up to the end)")
+    span.add_argument("--head", type=int, metavar="N", help="preview: the first N bytes (same as --start 0 --length N)")
+    extract_range.add_argument("--output", help="write ranges here instead of inside each folder")
+
+    verify = commands.add_parser("verify", help="check output folders for missing or corrupt parts")
+    verify.add_argument("inputs", nargs="+", help="output folders or globs; a parent folder covers its subfolders")
+    verify.add_argument("--parts-only", action="store_true",
+                        help="only check each part's CRC32, not the whole-payload SHA-256 (less data moved)")
+
+    scan = commands.add_parser("scan", help="list what output folders hold from part headers alone (fast)")
+    scan.add_argument("inputs", nargs="+", help="output folders or globs; a parent folder covers its subfolders")
+
+    search = commands.add_parser("search", help="find output folders by text title or file name in the catalog")
+    search.add_argument("query", help="text to look for, case-insensitive ('' lists every folder)")
+    search.add_argument("--type", choices=["text", "file"], help="only text_N or archive_N folders")
+
+    commands.add_parser("rebuild-catalog", help="rebuild the output folder catalog from the folders on disk")
+
+    args = parser.parse_args(argv)
+    if args.parity > 0 and not (args.parity_group >= 1 and args.parity + args.parity_group <= 256):
+        parser.error("--parity-group must be at least 1, and --parity plus --parity-group at most 256")
+    if args.command == "extract-range" and (args.start < 0 or (args.length or 0) < 0 or (args.head or 0) < 0):
+        parser.error("--start, --length and --head cannot be negative")
+    if args.command == "extract-range" and args.head is not None and args.start:
+        parser.error("--head always starts at byte 0; use --start with --length instead")
+    if args.dedup and args.parity > 0:
+        parser.error("--parity cannot be combined with --dedup: chunk images are shared between folders")
+    if args.command == "hide-text" and args.text is None and not args.inputs:
+        parser.error("hide-text needs input files or --text")
+    return args
+
+def run_command(args):
+    # Runs a batch subcommand, logging one line per input to stderr and printing a JSON summary to stdout.
+    # Returns the exit code: 0 when every input succeeded, 1 otherwise.
+    def log(result):
+        if result["ok"]:
+            status, detail = "ok", result.get("output") or result.get("folder", "")
+        elif "error" in result:
+            status, detail = "FAILED", result["error"]
+        else:
+            status, detail = "FAILED", "; ".join(result["errors"][:1]) or f"missing parts {result['missing']}"
+        print(f"{status:>6}  {result['input']}  {detail}", file=sys.stderr)
+
     create_directory_structure()
+    if args.command == "hide-text":
+        results = batch.hide_texts(args.inputs, args.title, args.text, args.workers, on_result=log)
+    elif args.command == "hide-file":
+        results = batch.hide_files(args.inputs, args.workers, config.BASE64_BACKUP and not args.no_base64,
+                                   on_result=log)
+    elif args.command == "extract":
+        results = batch.extract_folders(args.inputs, args.output, args.workers, on_result=log)
+    elif args.command == "extract-range":
+        start, length = (0, args.head) if args.head is not None else (args.start, args.length)
+        results = batch.extract_ranges(args.inputs, start, length, args.output, args.workers, on_result=log)
+    elif args.command == "scan":
+        results = batch.scan_folders(args.inputs, args.workers, on_result=log)
+    else:
+        results = batch.verify_folders(args.inputs, args.workers, not args.parts_only, on_result=log)
+
+    failed = sum(1 for result in results if not result["ok"])
+    json.dump({
+        "command": args.command,
+        "ok": failed == 0,
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    }, sys.stdout, indent=2)
+    print()
+    return 0 if failed == 0 else 1
+
+def run_catalog_command(args):
+    # Runs a catalog subcommand and prints its JSON result to stdout. Returns the exit code.
+    if args.command == "rebuild-catalog":
+        document = {"command": args.command, "ok": True, "folders": rebuild_catalog()}
+    else:
+        results = search_folders(args.query, args.type)
+        for entry in results:
+            entry["folder"] = os.path.join(config.OUTPUT_DIR, entry["folder"])
+        document = {"command": args.command, "ok": True, "count": len(results), "results": results}
+    json.dump(document, sys.stdout, indent=2)
+    print()
+    return 0
+
+def main():
+    args = parse_args()
+    config.PNG_PROFILE = args.png_profile
+    config.WORKERS = args.workers
+    config.PARITY_PARTS = args.parity
+    config.PARITY_GROUP = args.parity_group
+    config.DEDUP = args.dedup
+    if args.metrics:
+        config.METRICS = True
+        config.METRICS_REPORT = args.metrics
+
+    if args.command in ("search", "rebuild-catalog"):
+        sys.exit(run_catalog_command(args))
+    if args.command:
+        sys.exit(run_command(args))
+
+    for directory in create_directory_structure():
+        console.print(f"[dim]Directory '{directory}' created.[/dim]")
+
     while True:
         show_header()
         show_menu()
@@ -70,6 +224,10 @@ def main():
             hide_archive_in_image()
             console.input("\n[dim]Press Enter to return to the menu...[/dim]")
             continue
+        if option == "4":
+            manage_carrier_pool()
+            console.input("\n[dim]Press Enter to return to the menu...[/dim]")
+            continue
 
         console.print("\n[bold red]Invalid option. Try again.[/bold red]")
         console.input("\n[dim]Press Enter to continue...[/dim]")
@@ -1,60 +1,117 @@
 # reader.py - Functions to read and extract hidden text and files from PNG images using LSB steganography.
 import os
-import json
-from stegano import lsb
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
+from rich.markup import escape
 
 import config
-from helpers.file_helper import list_folders, find_numbered_images
-from helpers.byte_converter_helper import base64_to_file
+from api import (extract_archive, extract_range, read_text, restore_base64_backup, base64_backup_path,
+                 folder_overview, catalog_folders, search_folders)
+from helpers import metrics_helper as metrics
 
 console = Console()
 
+# Bytes of an extracted range shown on screen
+PREVIEW_BYTES = 256
 
-def extract_file_from_archive(folder_path: str):
+
+def _print_issues(summary, limit, incomplete_warning=False):
+    # Prints parts rebuilt from parity, missing parts and the first few per-image errors of a summary.
+    if summary.get("recovered"):
+        console.print(f"[bold cyan]Rebuilt from parity images:[/bold cyan] parts {summary['recovered']}")
+        for e in summary["repaired"][:limit]:
+            console.print(f"[dim]- {e}[/dim]")
+
+    if summary["missing"]:
+        console.print(f"[bold yellow]Warning:[/bold yellow] Missing parts: {summary['missing']}")
+        if incomplete_warning:
+            console.print("[bold red]File may be incomplete or corrupted![/bold red]")
+
+    errors = summary["errors"]
+    if errors:
+        console.print("\n[bold yellow]Some files had issues:[/bold yellow]")
+        for e in errors[:limit]:
+            console.print(f"- {e}")
+        if len(errors) > limit:
+            console.print(f"[dim]...and {len(errors) - limit} more[/dim]")
+
+
+def _show_metrics(records, folder):
+    # Prints a job's stage metrics and saves them in the folder it read (nothing when metrics are off).
+    if not records or not config.METRICS:
+        return
+    console.print(metrics.metrics_table(records))
+    report = metrics.write_report(records, folder, "extract")
+    if report:
+        console.print(f"[dim]Metrics saved: {report}[/dim]")
+
+
+def _describe_folder(folder_path):
+    # Returns (content, parts, size) columns for the folder listing, read from part headers alone.
+    try:
+        overview = folder_overview(folder_path)
+    except ValueError:
+        return "[dim]no images[/dim]", "", ""
+
+    if overview["legacy"]:
+        return "[dim]legacy format[/dim]", f"{overview['images']} images", ""
+    if overview["error"]:
+        return f"[red]unreadable: {overview['error']}[/red]", f"{overview['images']} images", ""
+
+    parts = f"{overview['images']}/{overview['expected']} images"
+    if overview["parity"]:
+        parts += f" ({overview['parity']} parity)"
+    if overview["images"] != overview["expected"]:
+        parts = f"[yellow]{parts}[/yellow]"
+    size = f"{overview['size'] / 1024:.2f} KB" if overview["size"] is not None else "?"
+    return overview["name"] or "[dim](untitled)[/dim]", parts, f"[dim]{size} {overview['compression']}[/dim]"
+
+
+def _describe_entry(entry):
+    # Returns the listing columns of a catalog row; rows without recorded content (legacy folders, unfinished
+    # jobs) are described from their part headers instead.
+    if entry["kind"] is None:
+        return _describe_folder(os.path.join(config.OUTPUT_DIR, entry["folder"]))
+
+    parts = f"{entry['images']} images"
+    if entry["parity"]:
+        parts += f" ({entry['parity']} parity)"
+    size = f"{entry['payload_size'] / 1024:.2f} KB" if entry["payload_size"] is not None else "?"
+    return entry["name"] or "[dim](untitled)[/dim]", parts, f"[dim]{size} {entry['compression']}[/dim]"
+
+
+def extract_file_from_archive(folder_path: str, workers=None):
     # Extracts a hidden file from archive images, supporting multi-image splits.
 
     # Check if base64 text file exists
-    base64_folder = os.path.join(folder_path, "base64")
-    base64_txt_path = os.path.join(base64_folder, "payload.txt")
-    
-    has_base64_file = os.path.exists(base64_txt_path)
+    has_base64_file = os.path.exists(base64_backup_path(folder_path))
     
     # Ask user extraction method
     console.print("\n[bold]Select extraction method:[/bold]")
     console.print("[green]1[/green] - Extract file from images (LSB steganography)")
     if has_base64_file:
         console.print("[green]2[/green] - Convert from base64 text file (faster)")
+    console.print("[green]3[/green] - Extract only a byte range (preview, header or slice)")
     
     method = console.input("\n[bold yellow]Choose option:[/bold yellow] ").strip()
+
+    if method == "3":
+        extract_byte_range(folder_path, workers)
+        return
     
-    # Option 2: Use base64 text file directly
+    # Option 2: Convert the base64 text file directly
     if method == "2" and has_base64_file:
         try:
-            with open(base64_txt_path, 'r') as f:
-                base64_content = f.read()
-            
-            # Save to temporary file and convert
-            os.makedirs(config.OUTPUT_TEMP_FILES, exist_ok=True)
-            temp_file = os.path.join(config.OUTPUT_TEMP_FILES, "extracted_payload.txt")
-            
-            with open(temp_file, 'w') as f:
-                f.write(base64_content)
-            
-            # Convert base64 back to original file
-            output_name = os.path.join(folder_path, "extracted_file")
-            base64_to_file(temp_file, output_name)
-            
-            # Clean up
-            os.remove(temp_file)
+            with metrics.job() as records:
+                output = restore_base64_backup(folder_path)
+            _show_metrics(records, folder_path)
             
             console.print(
                 Panel(
                     f"[bold green]Success![/bold green]\n"
                     f"File extracted from base64 text file\n"
-                    f"Saved in: [green]{folder_path}[/green]",
+                    f"Saved in: [green]{output}[/green]",
                     border_style="green"
                 )
             )
@@ -65,104 +122,76 @@ def extract_file_from_archive(folder_path: str):
             return
     
     # Option 1 or fallback: Extract from images
-    # Find numbered images
-    numbered_files = find_numbered_images(folder_path)
-    
-    if not numbered_files:
-        console.print("[bold yellow]No output images found (e.g., 1_output.png, 2_output.png...).[/bold yellow]")
+    try:
+        with metrics.job() as records, console.status("[cyan]Extracting hidden file...[/cyan]"):
+            summary = extract_archive(folder_path, workers=workers)
+    except ValueError as e:
+        console.print(f"[bold red]{e}[/bold red]")
         return
+    _show_metrics(records, folder_path)
     
-    # Extract hidden data from images
-    parts = {}
-    filename = None
-    expected_total = None
-    errors = []
-    
-    with console.status("[cyan]Extracting hidden file...[/cyan]"):
-        for idx, file in numbered_files:
-            file_path = os.path.join(folder_path, file)
-            
-            try:
-                secret = lsb.reveal(file_path)
-                if not secret:
-                    errors.append(f"{file}: no hidden data found")
-                    continue
-                
-                data = json.loads(secret)
-                
-                # Extract metadata and base64 chunk
-                part = int(data.get("part", idx))
-                total = int(data.get("total", 0))
-                chunk = data.get("data", "")
-                
-                if filename is None:
-                    filename = data.get("filename", "extracted_file")
-                
-                if expected_total is None and total > 0:
-                    expected_total = total
-                
-                parts[part] = chunk
-                
-            except Exception as e:
-                errors.append(f"{file}: {e}")
+    _print_issues(summary, 5, incomplete_warning=True)
     
-    if not parts:
-        console.print("[bold red]No readable hidden data was found in these images.[/bold red]")
+    if summary["output"] is None:
+        console.print(f"[bold red]Error converting file: {summary['errors'][-1]}[/bold red]")
         return
     
-    # Rebuild base64 in correct order
-    if expected_total is None:
-        ordered_keys = sorted(parts.keys())
+    # A file that fails its checks is still written, so whatever survived can be recovered by hand
+    if summary["ok"]:
+        status, border = "[bold green]Success![/bold green]", "green"
     else:
-        ordered_keys = list(range(1, expected_total + 1))
-    
-    full_base64 = "".join(parts.get(k, "") for k in ordered_keys)
-    
-    # Show warnings for missing parts
-    missing = []
-    if expected_total is not None:
-        missing = [k for k in range(1, expected_total + 1) if k not in parts]
-    
-    if missing:
-        console.print(f"[bold yellow]Warning:[/bold yellow] Missing parts: {missing}")
-        console.print("[bold red]File may be incomplete or corrupted![/bold red]")
-    
-    if errors:
-        console.print("\n[bold yellow]Some files had issues:[/bold yellow]")
-        for e in errors[:5]:
-            console.print(f"- {e}")
-        if len(errors) > 5:
-            console.print(f"[dim]...and {len(errors) - 5} more[/dim]")
-    
-    # Save to temporary file and convert back to original file
+        status, border = "[bold yellow]Extracted, but the file failed its integrity checks.[/bold yellow]", "yellow"
+    console.print(
+        Panel(
+            f"{status}\n"
+            f"File extracted: [bold]{summary['name']}[/bold]\n"
+            f"Saved in: [green]{os.path.dirname(summary['output'])}[/green]",
+            border_style=border
+        )
+    )
+
+
+def extract_byte_range(folder_path: str, workers=None):
+    # Extracts a byte range of an archive's file, revealing only the images that hold it, and previews its start.
+    start = console.input("[bold]First byte[/bold] [dim](Enter for 0)[/dim]: ").strip() or "0"
+    length = console.input("[bold]Number of bytes[/bold] [dim](Enter for 1024, 'all' up to the end)[/dim]: ").strip()
+    length = length or "1024"
+    if not start.isdigit() or not (length.isdigit() or length == "all"):
+        console.print("[bold red]Invalid input.[/bold red]")
+        return
+
     try:
-        os.makedirs(config.OUTPUT_TEMP_FILES, exist_ok=True)
-        temp_file = os.path.join(config.OUTPUT_TEMP_FILES, "extracted_payload.txt")
-        
-        with open(temp_file, 'w') as f:
-            f.write(full_base64)
-        
-        # Convert base64 back to original file
-        output_name = os.path.join(folder_path, "extracted_file")
-        base64_to_file(temp_file, output_name)
-        
-        # Clean up temporary file
-        os.remove(temp_file)
-        
-        console.print(
-            Panel(
-                f"[bold green]Success![/bold green]\n"
-                f"File extracted: [bold]{filename}[/bold]\n"
-                f"Saved in: [green]{folder_path}[/green]",
-                border_style="green"
-            )
+        with metrics.job() as records, console.status("[cyan]Extracting byte range...[/cyan]"):
+            summary = extract_range(folder_path, int(start), None if length == "all" else int(length),
+                                    workers=workers)
+    except ValueError as e:
+        console.print(f"[bold red]{e}[/bold red]")
+        return
+    _show_metrics(records, folder_path)
+
+    _print_issues(summary, 5)
+    with open(summary["output"], "rb") as f:
+        head = f.read(PREVIEW_BYTES)
+    # Text previews may end mid-character; anything else that does not decode is shown as hex
+    preview = head.decode("utf-8", errors="ignore")
+    if len(preview.encode("utf-8")) < len(head) - 3 or any(c < " " and c not in "\t\r\n" for c in preview):
+        preview = head.hex(" ", 1)
+
+    status, border = ("[bold green]Success![/bold green]", "green") if summary["ok"] else \
+        ("[bold yellow]Range incomplete.[/bold yellow]", "yellow")
+    console.print(
+        Panel(
+            f"{status}\n"
+            f"Bytes {summary['start']}-{summary['end']} of [bold]{summary['name']}[/bold] "
+            f"from {len(summary['parts'])} image(s)\n"
+            f"Saved in: [green]{summary['output']}[/green]\n\n"
+            f"[dim]{escape(preview)}[/dim]",
+            border_style=border
         )
-        
-    except Exception as e:
-        console.print(f"[bold red]Error converting file: {e}[/bold red]")
+    )
 
 
-def read_image():
+def read_image(workers=None):
     # Reads and reconstructs hidden text from PNG images using LSB steganography.
 
     console.print(
@@ -195,24 +224,33 @@ def read_image():
     else:
         folder_prefix = config.FOLDER_ARCHIVES_PREFIX
     
-    # Get folders filtered by prefix
-    all_folders = list_folders(config.OUTPUT_DIR)
-    folders = [f for f in all_folders if f.startswith(folder_prefix)]
-    
+    # Folders come from the output catalog, so listing them reads no image and no directory
+    folders = catalog_folders(folder_prefix)
     if not folders:
         console.print(f"[bold yellow]No '{folder_prefix}' folders found.[/bold yellow]")
         return
 
-    # Display folders
-    table = Table(show_header=False, box=None)
-    for index, folder in enumerate(folders, start=1):
-        table.add_row(f"[bold green]{index}[/bold green]", folder)
+    # Typing anything but a number narrows the list to the folders whose title or file name contains it
+    kind = "text" if operation == "1" else "file"
+    while True:
+        table = Table(show_header=False, box=None)
+        for index, entry in enumerate(folders, start=1):
+            table.add_row(f"[bold green]{index}[/bold green]", entry["folder"], *_describe_entry(entry))
+
+        console.print("\n[bold]Available folders:[/bold]\n")
+        console.print(table)
+
+        choice = console.input(
+            "\n[bold yellow]Select the folder number (or type a name to search):[/bold yellow] "
+        ).strip()
+        if choice.isdigit() or not choice:
+            break
+        matches = search_folders(choice, kind)
+        if matches:
+            folders = matches
+        else:
+            console.print(f"[bold yellow]No folder matches '{choice}'.[/bold yellow]")
 
-    console.print("\n[bold]Available folders:[/bold]\n")
-    console.print(table)
-
-    # Get user selection
-    choice = console.input("\n[bold yellow]Select the folder number:[/bold yellow] ").strip()
     if not choice.isdigit():
         console.print("[bold red]Invalid input.[/bold red]")
         return
@@ -222,83 +260,31 @@ def read_image():
         console.print("[bold red]Invalid number.[/bold red]")
         return
 
-    selected_folder = folders[choice - 1]
+    selected_folder = folders[choice - 1]["folder"]
     selected_path = os.path.join(config.OUTPUT_DIR, selected_folder)
+    if not os.path.isdir(selected_path):
+        console.print(f"[bold red]{selected_folder} no longer exists.[/bold red] "
+                      "[dim]Run 'python main.py rebuild-catalog' to drop deleted folders from the list.[/dim]")
+        return
 
     console.print(f"\n[green]Selected:[/green] {selected_folder}\n")
 
     # Handle archive extraction (option 2)
     if operation == "2":
-        extract_file_from_archive(selected_path)
+        extract_file_from_archive(selected_path, workers)
         return
 
-    # Find numbered images
-    numbered_files = find_numbered_images(selected_path)
-
-    if not numbered_files:
-        console.print("[bold yellow]No output images found (e.g., 1_output.png, 2_output.png...).[/bold yellow]")
-        return
-
-    # Extract hidden text from images
-    parts = {}
-    title = None
-    expected_total = None
-    errors = []
-
-    with console.status("[cyan]Revealing hidden text...[/cyan]"):
-        for idx, filename in numbered_files:
-            file_path = os.path.join(selected_path, filename)
-
-            try:
-                secret = lsb.reveal(file_path)
-                if not secret:
-                    errors.append(f"{filename}: no hidden data found")
-                    continue
-
-                data = json.loads(secret)
-
-                # Extract metadata and text
-                part = int(data.get("part", idx))
-                total = int(data.get("total", 0))
-                text = data.get("text", "")
-
-                if title is None:
-                    title = data.get("title")
-
-                if expected_total is None and total > 0:
-                    expected_total = total
-
-                parts[part] = text
-
-            except Exception as e:
-                errors.append(f"{filename}: {e}")
-
-    if not parts:
-        console.print("[bold red]No readable hidden text was found in these images.[/bold red]")
+    try:
+        with metrics.job() as records, console.status("[cyan]Revealing hidden text...[/cyan]"):
+            summary = read_text(selected_path, workers)
+    except ValueError as e:
+        console.print(f"[bold red]{e}[/bold red]")
         return
+    _show_metrics(records, selected_path)
 
-    # Rebuild text in correct order
-    if expected_total is None:
-        ordered_keys = sorted(parts.keys())
-    else:
-        ordered_keys = list(range(1, expected_total + 1))
-
-    full_text = "".join(parts.get(k, "") for k in ordered_keys)
-
-    # Show warnings for missing parts
-    missing = []
-    if expected_total is not None:
-        missing = [k for k in range(1, expected_total + 1) if k not in parts]
-
-    if missing:
-        console.print(f"[bold yellow]Warning:[/bold yellow] Missing parts: {missing}")
-
-    if errors:
-        console.print("\n[bold yellow]Some files had issues:[/bold yellow]")
-        for e in errors[:8]:
-            console.print(f"- {e}")
-        if len(errors) > 8:
-            console.print(f"[dim]...and {len(errors) - 8} more[/dim]")
+    _print_issues(summary, 8)
+    title = summary["name"]
+    full_text = summary["text"]
 
     # Display extracted text
     console.print(
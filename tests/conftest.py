@@ -0,0 +1,28 @@
+# conftest.py - Shared fixtures: every test runs in its own working directory with a small synthetic carrier pool.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from helpers.carrier_helper import add_carrier, generate_carrier
+
+# Small carriers keep every embed fast; the larger one fills the full parts, the smaller one the last
+CARRIER_SIZES = [(96, 64), (40, 30)]
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    # Runs a test inside tmp_path, where the relative pool, output and chunk store paths of config resolve,
+    # with a pool of CARRIER_SIZES carriers, no compression and sequential workers. Returns tmp_path.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "COMPRESSION", "none")
+    monkeypatch.setattr(config, "WORKERS", 1)
+    monkeypatch.setattr(config, "PARITY_PARTS", 0)
+    monkeypatch.setattr(config, "DEDUP", False)
+    for seed, (width, height) in enumerate(CARRIER_SIZES):
+        add_carrier(generate_carrier(width, height, seed=seed))
+    return tmp_path
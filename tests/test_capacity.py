@@ -0,0 +1,78 @@
+# test_capacity.py - Parts are filled to the exact carrier capacity and still round-trip.
+
+import os
+
+import numpy as np
+import pytest
+
+import api
+import config
+from helpers.carrier_helper import plan_carriers
+from helpers.container_helper import chunk_capacity, pack_part, hide_part, KIND_FILE
+from conftest import CARRIER_SIZES
+
+NAME = "payload.bin"
+MODES = [(1, False), (2, True), (4, False)]
+
+
+def _capacity(width, height):
+    return chunk_capacity(width, height, NAME, config.LSB_BITS, config.LSB_ALPHA)
+
+
+def _hide_and_extract(workspace, data):
+    # Hides data as NAME through the file pipeline and returns (job, folder, extracted bytes, summary).
+    path = workspace / NAME
+    path.write_bytes(data)
+    job = api.prepare_file(str(path))
+    folder = api.new_output_folder(config.FOLDER_ARCHIVES_PREFIX)
+    api.write_parts(job, folder, workers=1)
+    summary = api.extract_archive(folder, output_dir=str(workspace / "extracted"), workers=1)
+    return job, folder, (workspace / "extracted" / NAME).read_bytes(), summary
+
+
+@pytest.mark.parametrize("bits, alpha", MODES)
+def test_payload_of_exact_capacity_fills_one_part(workspace, monkeypatch, bits, alpha):
+    monkeypatch.setattr(config, "LSB_BITS", bits)
+    monkeypatch.setattr(config, "LSB_ALPHA", alpha)
+    capacity = _capacity(*CARRIER_SIZES[0])
+    data = os.urandom(capacity)
+
+    job, folder, extracted, summary = _hide_and_extract(workspace, data)
+
+    assert [size for _, size in job["plan"]] == [capacity]
+    assert summary["ok"], summary
+    assert extracted == data
+
+
+@pytest.mark.parametrize("bits, alpha", MODES)
+def test_one_byte_over_capacity_does_not_fit(workspace, monkeypatch, bits, alpha):
+    monkeypatch.setattr(config, "LSB_BITS", bits)
+    monkeypatch.setattr(config, "LSB_ALPHA", alpha)
+    width, height = CARRIER_SIZES[0]
+    capacity = _capacity(width, height)
+    carrier = np.zeros((height, width, 3), dtype=np.uint8)
+
+    hide_part(carrier, pack_part(KIND_FILE, NAME, 1, 1, bytes(capacity), bits=bits, alpha=alpha))
+    with pytest.raises(ValueError):
+        hide_part(carrier, pack_part(KIND_FILE, NAME, 1, 1, bytes(capacity + 1), bits=bits, alpha=alpha))
+
+    # The planner therefore needs a second part for the extra byte
+    assert [size for _, size in plan_carriers(capacity + 1, NAME)] == [capacity, 1]
+
+
+@pytest.mark.parametrize("bits, alpha", MODES)
+def test_every_part_but_the_last_is_full(workspace, monkeypatch, bits, alpha):
+    monkeypatch.setattr(config, "LSB_BITS", bits)
+    monkeypatch.setattr(config, "LSB_ALPHA", alpha)
+    capacity = _capacity(*CARRIER_SIZES[0])
+    data = os.urandom(3 * capacity + 17)
+
+    job, folder, extracted, summary = _hide_and_extract(workspace, data)
+
+    lengths = [image["length"] for image in api.scan_folder(folder, workers=1)["images"]]
+    assert lengths == [capacity, capacity, capacity, 17]
+    assert [size for _, size in job["plan"]] == lengths
+    # The final part goes to the smallest carrier that holds it
+    assert job["plan"][-1][0]["width"] == CARRIER_SIZES[-1][0]
+    assert summary["ok"], summary
+    assert extracted == data
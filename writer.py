@@ -1,27 +1,166 @@
 # writer.py - Functions to hide text and files inside PNG images using LSB steganography.
 import os
-import json
-from stegano import lsb
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
 
 import config
-from helpers.image_helper import download_random_dog_image, calculate_capacity
-from helpers.text_helper import split_text_by_bytes, calculate_overhead
-from helpers.file_helper import get_next_folder_index
-from helpers.byte_converter_helper import file_to_base64
+from api import (prepare_file, prepare_text, write_parts, write_base64_backup, new_output_folder, part_count,
+                 reused_chunks, compression_name)
+from helpers.carrier_helper import load_pool_index, refill_pool
+from helpers.container_helper import KIND_FILE
+from helpers.parallel_helper import resolve_workers
+from helpers.compression_helper import CODEC_NAMES
+from helpers import metrics_helper as metrics
 
 console = Console()
 
 
-def hide_archive_in_image():
-    # Embeds files into PNG images using Base64 and LSB steganography, supporting multi-image splits.
+def _describe_plan(plan):
+    # Formats the carriers row of the info table, e.g. "3x 1920x1080, 1x 320x240".
+    counts = {}
+    for entry, _ in plan:
+        if entry is None:
+            continue
+        key = f"{entry['width']}x{entry['height']}"
+        counts[key] = counts.get(key, 0) + 1
+    return ", ".join(f"{count}x {size}" for size, count in counts.items()) or "none (every chunk is stored)"
+
+
+def _describe_compression(job):
+    # Formats the compression row of the info table.
+    codec, original_size, payload_size = job["codec"], job["size"], job["payload_size"]
+    if "chunks" in job:
+        return compression_name(job)
+    if codec == 0:
+        return "none" if config.COMPRESSION == "none" else "none (data does not shrink)"
+    return f"{CODEC_NAMES[codec]} ({original_size} -> {payload_size} bytes)"
+
+
+def _show_job_info(job, folder, workers):
+    # Prints the info table shared by the text and file writers.
+    plan = job["plan"]
+    info = Table(show_header=False, box=None)
+    if job["kind"] == KIND_FILE:
+        info.add_row("[bold]File:[/bold]", f"[green]{job['name']}[/green]")
+    info.add_row("[bold]Output folder:[/bold]", f"[green]{folder}[/green]")
+    if "chunks" in job:
+        info.add_row("[bold]Carriers:[/bold]", "smallest that holds each compressed chunk")
+    else:
+        info.add_row("[bold]Carriers:[/bold]", _describe_plan(plan))
+    info.add_row("[bold]Largest part:[/bold]", f"{max(size for _, size in plan)} bytes")
+    info.add_row("[bold]LSB mode:[/bold]", f"{config.LSB_BITS} bit(s) per {'RGBA' if config.LSB_ALPHA else 'RGB'} channel")
+    if job["kind"] == KIND_FILE:
+        info.add_row("[bold]File size:[/bold]", f"{job['size']} bytes")
+    else:
+        info.add_row("[bold]Total characters:[/bold]", str(job["characters"]))
+    info.add_row("[bold]Compression:[/bold]", _describe_compression(job))
+    if job["parity"]:
+        parity = part_count(job) - len(plan)
+        info.add_row("[bold]Parity:[/bold]", f"{job['parity']} per {job['group']} image(s), {parity} extra image(s)")
+    if "chunks" in job:
+        reused = reused_chunks(job)
+        info.add_row("[bold]Deduplication:[/bold]",
+                     f"{reused} of {len(plan)} chunk(s) already stored, {len(plan) - reused} to embed")
+    info.add_row("[bold]Images to generate:[/bold]", str(part_count(job)))
+    info.add_row("[bold]Workers:[/bold]", str(workers))
+    info.add_row("[bold]PNG profile:[/bold]", config.PNG_PROFILE)
+    console.print(info)
+    console.print("")
+
+
+def _write_with_progress(job, folder, workers, description):
+    # Runs write_parts behind a progress bar.
+    with Progress(
+        TextColumn("[bold cyan]{task.description}"),
+        BarColumn(),
+        TextColumn("{task.completed}/{task.total}"),
+        TimeElapsedColumn(),
+        console=console
+    ) as progress:
+        task = progress.add_task(description, total=part_count(job))
+        write_parts(job, folder, workers, on_done=lambda _: progress.advance(task))
+
+
+def _show_metrics(records, folder):
+    # Prints a job's stage metrics and saves them next to its images (nothing when metrics are off).
+    if not records or not config.METRICS:
+        return
+    console.print(metrics.metrics_table(records))
+    if folder is not None:
+        report = metrics.write_report(records, folder, "hide")
+        if report:
+            console.print(f"[dim]Metrics saved: {report}[/dim]")
+
+
+def _hide_file(path, workers):
+    # Hides a file into a new archive folder and returns the folder, or None when it could not be planned.
+    try:
+        job = prepare_file(path)
+    except RuntimeError as e:
+        console.print(f"[bold red]{e}[/bold red]")
+        return None
+    
+    total = part_count(job)
+    workers = resolve_workers(workers, total)
+    new_folder = new_output_folder(config.FOLDER_ARCHIVES_PREFIX)
+    _show_job_info(job, new_folder, workers)
+    
+    # Save base64 content to text file in base64 subfolder
+    if config.BASE64_BACKUP:
+        base64_txt_path = write_base64_backup(path, new_folder)
+        console.print(f"[dim]Base64 text file saved: {base64_txt_path}[/dim]\n")
+    
+    # Hide file bytes into images with progress bar
+    _write_with_progress(job, new_folder, workers, "Hiding file into images...")
+    
+    console.print(
+        Panel(
+            f"[bold green]Done![/bold green]\n"
+            f"Generated [bold]{total}[/bold] image(s) in:\n[green]{new_folder}[/green]",
+            border_style="green"
+        )
+    )
+    return new_folder
+
+
+def _hide_text(title, comment, workers):
+    # Hides text into a new text folder and returns the folder, or None when it could not be planned.
+
+    # Pick pooled carriers so the text fits in the fewest images, each part filled to its carrier's exact capacity
+    try:
+        job = prepare_text(title, comment)
+    except RuntimeError as e:
+        console.print(f"[bold red]{e}[/bold red]")
+        return None
+
+    total = part_count(job)
+    workers = resolve_workers(workers, total)
+
+    # Create next folder: text_1, text_2, text_3...
+    new_folder = new_output_folder(config.FOLDER_PREFIX)
+    _show_job_info(job, new_folder, workers)
+
+    # Hide text into images with progress bar
+    _write_with_progress(job, new_folder, workers, "Hiding text into images...")
+
+    console.print(
+        Panel(
+            f"[bold green]Done![/bold green]\n"
+            f"Generated [bold]{total}[/bold] image(s) in:\n[green]{new_folder}[/green]",
+            border_style="green"
+        )
+    )
+    return new_folder
+
+
+def hide_archive_in_image(workers=None):
+    # Embeds files into PNG images as raw bytes in binary containers via LSB steganography, supporting multi-image splits.
     console.print(
         Panel.fit(
-            "[bold cyan]Hide File in Image (Base64)[/bold cyan]\n"
-            "[dim]Hides any file inside PNG images using Base64 encoding.\nSupports large files with multiple images.[/dim]",
+            "[bold cyan]Hide File in Image[/bold cyan]\n"
+            "[dim]Hides any file inside PNG images as raw bytes.\nSupports large files with multiple images.[/dim]",
             border_style="cyan"
         )
     )
@@ -65,108 +204,11 @@ def hide_archive_in_image():
     
     console.print(f"\n[green]Selected:[/green] {selected_file}\n")
     
-    # Get file name for metadata
-    file_name = os.path.basename(path)
-    
-    # Ensure temporary folder exists
-    os.makedirs(config.OUTPUT_TEMP_FILES, exist_ok=True)
-    
-    # Convert file to base64
-    temp_payload_path = config.OUTPUT_TEMP_FILES + "temp_payload.txt"
-    file_to_base64(path, temp_payload_path)
-    
-    # Read base64 content
-    with open(temp_payload_path, 'r') as f:
-        base64_content = f.read()
-    
-    # Create base image (can be the same dog image)
-    if not os.path.exists(config.TEMP_IMAGE):
-        console.print("[bold yellow]Base image not found. Creating a new one...[/bold yellow]")
-        download_random_dog_image()
-    
-    # Calculate capacity and split base64 content if needed
-    capacity = calculate_capacity(config.TEMP_IMAGE)
-    overhead = calculate_overhead(file_name)
-    max_payload_bytes = max(1, capacity - overhead)
-    
-    parts = split_text_by_bytes(base64_content, max_payload_bytes)
-    total = len(parts)
-    
-    # Create output folder
-    os.makedirs(config.OUTPUT_DIR, exist_ok=True)
-    folder_index = get_next_folder_index(config.OUTPUT_DIR)
-    new_folder = os.path.join(config.OUTPUT_DIR, f"{config.FOLDER_ARCHIVES_PREFIX}{folder_index}")
-    os.makedirs(new_folder, exist_ok=True)
-    
-    # Display information
-    info = Table(show_header=False, box=None)
-    info.add_row("[bold]File:[/bold]", f"[green]{file_name}[/green]")
-    info.add_row("[bold]Output folder:[/bold]", f"[green]{new_folder}[/green]")
-    info.add_row("[bold]Image capacity (approx):[/bold]", f"{capacity} bytes")
-    info.add_row("[bold]Usable payload per image:[/bold]", f"{max_payload_bytes} bytes")
-    info.add_row("[bold]Total base64 size:[/bold]", f"{len(base64_content)} bytes")
-    info.add_row("[bold]Images to generate:[/bold]", str(total))
-    console.print(info)
-    console.print("")
-    
-    # Save base64 content to text file in base64 subfolder
-    base64_folder = os.path.join(new_folder, "base64")
-    os.makedirs(base64_folder, exist_ok=True)
-    base64_txt_path = os.path.join(base64_folder, "payload.txt")
-    
-    with open(base64_txt_path, 'w') as f:
-        f.write(base64_content)
-    
-    console.print(f"[dim]Base64 text file saved: {base64_txt_path}[/dim]\n")
-    
-    # Hide base64 into images with progress bar
-    with Progress(
-        TextColumn("[bold cyan]{task.description}"),
-        BarColumn(),
-        TextColumn("{task.completed}/{task.total}"),
-        TimeElapsedColumn(),
-        console=console
-    ) as progress:
-        
-        task = progress.add_task("Hiding file into images...", total=total)
-        
-        for i, chunk in enumerate(parts, start=1):
-            output_name = os.path.join(new_folder, f"{i}{config.OUTPUT_SUFFIX}")
-            
-            payload = {
-                "filename": file_name,
-                "part": i,
-                "total": total,
-                "data": chunk
-            }
-            
-            secret_data = json.dumps(payload, ensure_ascii=False)
-            secret_img = lsb.hide(config.TEMP_IMAGE, secret_data)
-            secret_img.save(output_name)
-            
-            progress.advance(task)
-    
-    # Delete temporary base64 file after hiding in image
-    try:
-        os.remove(temp_payload_path)
-    except Exception:
-        pass
-    
-    # Remove temporary base image
-    try:
-        os.remove(config.TEMP_IMAGE)
-    except Exception:
-        pass
-    
-    console.print(
-        Panel(
-            f"[bold green]Done![/bold green]\n"
-            f"Generated [bold]{total}[/bold] image(s) in:\n[green]{new_folder}[/green]",
-            border_style="green"
-        )
-    )
+    with metrics.job() as records:
+        folder = _hide_file(path, workers)
+    _show_metrics(records, folder)
 
-def write_image(title: str, comment: str):
+def write_image(title: str, comment: str, workers=None):
     # Hides text in PNG images via LSB steganography using the given title and content.
     
     if comment.strip() == "":
@@ -176,79 +218,58 @@ def write_image(title: str, comment: str):
     console.print(
         Panel.fit(
             "[bold cyan]Image Writer (Steganography)[/bold cyan]\n"
-            "[dim]Hides text inside PNG images using LSB (stegano).[/dim]",
+            "[dim]Hides text inside PNG images using LSB steganography.[/dim]",
             border_style="cyan"
         )
     )
 
-    # Ensure output base folder exists
-    os.makedirs(config.OUTPUT_DIR, exist_ok=True)
-
-    # Create next folder: text_1, text_2, text_3...
-    folder_index = get_next_folder_index(config.OUTPUT_DIR)
-    new_folder = os.path.join(config.OUTPUT_DIR, f"{config.FOLDER_PREFIX}{folder_index}")
-    os.makedirs(new_folder)
-
-    # Ensure base image exists
-    if not os.path.exists(config.TEMP_IMAGE):
-        console.print("[bold yellow]Base image not found. Creating a new one...[/bold yellow]")
-        download_random_dog_image()
+    with metrics.job() as records:
+        folder = _hide_text(title, comment, workers)
+    _show_metrics(records, folder)
 
-    # Calculate capacity and split text
-    capacity = calculate_capacity(config.TEMP_IMAGE)
-    overhead = calculate_overhead(title)
-    max_payload_bytes = max(1, capacity - overhead)
 
-    parts = split_text_by_bytes(comment, max_payload_bytes)
-    total = len(parts)
-
-    # Display information
-    info = Table(show_header=False, box=None)
-    info.add_row("[bold]Output folder:[/bold]", f"[green]{new_folder}[/green]")
-    info.add_row("[bold]Image capacity (approx):[/bold]", f"{capacity} bytes")
-    info.add_row("[bold]Usable payload per image:[/bold]", f"{max_payload_bytes} bytes")
-    info.add_row("[bold]Total characters:[/bold]", str(len(comment)))
-    info.add_row("[bold]Images to generate:[/bold]", str(total))
-    console.print(info)
-    console.print("")
-
-    # Hide text into images with progress bar
-    with Progress(
-        TextColumn("[bold cyan]{task.description}"),
-        BarColumn(),
-        TextColumn("{task.completed}/{task.total}"),
-        TimeElapsedColumn(),
-        console=console
-    ) as progress:
-
-        task = progress.add_task("Hiding text into images...", total=total)
+def manage_carrier_pool():
+    # Shows the local carrier pool and optionally refills it by downloading or generating carriers.
+    console.print(
+        Panel.fit(
+            "[bold cyan]Carrier Pool[/bold cyan]\n"
+            f"[dim]Pre-decoded carrier images used for hiding, stored in {config.CARRIER_POOL_DIR}.[/dim]",
+            border_style="cyan"
+        )
+    )
 
-        for i, chunk in enumerate(parts, start=1):
-            output_name = os.path.join(new_folder, f"{i}{config.OUTPUT_SUFFIX}")
+    entries = load_pool_index()
+    if entries:
+        table = Table(show_header=True, box=None)
+        table.add_column("Resolution")
+        table.add_column("Carriers", justify="right")
+        table.add_column("Capacity (1 bit)", justify="right")
+        resolutions = {}
+        for entry in entries:
+            key = (entry["width"], entry["height"])
+            resolutions.setdefault(key, [0, entry["capacity"]])[0] += 1
+        for (width, height), (count, capacity) in sorted(resolutions.items()):
+            table.add_row(f"{width}x{height}", str(count), f"{capacity} bytes")
+        console.print(table)
+    else:
+        console.print("[bold yellow]The carrier pool is empty.[/bold yellow]")
 
-            payload = {
-                "title": title,
-                "part": i,
-                "total": total,
-                "text": chunk
-            }
+    console.print("\n[bold]Refill source:[/bold]")
+    console.print("[green]1[/green] - Download random dog images (needs network)")
+    console.print("[green]2[/green] - Generate synthetic carriers (offline)")
+    console.print("[red]Enter[/red] - Back")
 
-            secret_text = json.dumps(payload, ensure_ascii=False)
-            secret_img = lsb.hide(config.TEMP_IMAGE, secret_text)
-            secret_img.save(output_name)
+    source = console.input("\n[bold yellow]Choose option:[/bold yellow] ").strip()
+    if source not in ["1", "2"]:
+        return
 
-            progress.advance(task)
+    count = console.input("[bold yellow]How many carriers to add?[/bold yellow] ").strip()
+    if not count.isdigit() or int(count) < 1:
+        console.print("[bold red]Invalid number.[/bold red]")
+        return
 
-    # Remove temporary base image
-    try:
-        os.remove(config.TEMP_IMAGE)
-    except Exception:
-        pass
+    with metrics.job() as records, console.status("[cyan]Refilling carrier pool...[/cyan]"):
+        added = refill_pool(int(count), "download" if source == "1" else "synthetic")
 
-    console.print(
-        Panel(
-            f"[bold green]Done![/bold green]\n"
-            f"Generated [bold]{total}[/bold] image(s) in:\n[green]{new_folder}[/green]",
-            border_style="green"
-        )
-    )
+    console.print(f"[bold green]Added {added} carrier(s) to the pool.[/bold green]")
+    _show_metrics(records, None)